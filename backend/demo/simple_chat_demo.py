@@ -6,11 +6,16 @@ This demo simulates a voice conversation with the AI assistant using HTTP reques
 instead of WebSocket, making it more reliable for testing.
 """
 
+import array
 import requests
 import json
+import re
+import secrets
+import sys
 import time
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
 
@@ -20,13 +25,30 @@ class SimpleVoiceAgentChat:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
         self.session_id = None
-        self.user_id = f"user_{uuid.uuid4().hex[:8]}"
-        self.conversation_history = []
-        
+        # token_hex(4) asks the kernel for exactly the 4 random bytes we
+        # keep, instead of building a full UUID and discarding most of it
+        self.user_id = f"user_{secrets.token_hex(4)}"
+
+        # Conversation history stored column-wise (structure-of-arrays):
+        # cheaper per-entry than a dict and faster to scan for the summary
+        self.hist_ts = array.array("q")
+        self.hist_user: list = []
+        self.hist_ai: list = []
+        self.hist_ctx: list = []
+
+        # Reuse one HTTP session so repeated calls share a pooled keep-alive
+        # connection instead of opening a fresh TCP connection per request
+        self.http = requests.Session()
+        self.http.headers.update({"Accept": "application/json"})
+        self.http.mount(
+            "http://",
+            requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        )
+
     def check_server(self) -> bool:
         """Check if the server is running."""
         try:
-            response = requests.get(f"{self.base_url}/", timeout=5)
+            response = self.http.get(f"{self.base_url}/", timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 print(f"✅ Server is running: {data.get('message', 'Unknown')}")
@@ -42,7 +64,7 @@ class SimpleVoiceAgentChat:
     def create_livekit_token(self, room_name: str, participant_identity: str) -> Optional[str]:
         """Create a LiveKit access token."""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/api/v1/livekit/token",
                 params={
                     "room_name": room_name,
@@ -62,41 +84,57 @@ class SimpleVoiceAgentChat:
             print(f"❌ Error creating token: {e}")
             return None
     
-    def simulate_ai_response(self, user_message: str, screen_context: str = None) -> str:
-        """Simulate AI response based on user input."""
-        # This is a simple simulation - in a real app, this would call the AI API
-        
+    # Precomputed trigger word -> response template, built once at class
+    # definition so each turn is a set lookup instead of a chain of
+    # substring scans over the whole message
+    _RESPONSES = {
+        "greet": "{ctx}Hello! I'm your AI assistant. How can I help you today?",
+        "sheet": "{ctx}I can help you with spreadsheets! What specific task would you like assistance with? I can help with formulas, data analysis, charts, and more.",
+        "help": "{ctx}I'm here to help! I can assist with various tasks like spreadsheet work, document creation, data analysis, and more. What would you like to work on?",
+        "pivot": "{ctx}I'll guide you through creating a pivot table. First, select your data including headers. Then go to Insert > PivotTable. Choose where you want it to appear, and drag your fields to the appropriate areas in the PivotTable Fields pane.",
+        "formula": "{ctx}I can help you with Excel formulas! What type of calculation are you trying to perform? I can assist with SUM, AVERAGE, VLOOKUP, IF statements, and many other functions.",
+        "chart": "{ctx}Creating charts is easy! Select your data, then go to Insert > Charts. Choose the chart type that best represents your data. I can help you customize colors, labels, and formatting.",
+        "filter": "{ctx}To filter or sort your data, select your data range and go to Data > Filter. This will add filter arrows to your headers. You can also use Data > Sort to arrange your data in a specific order.",
+    }
+    _DEFAULT_RESPONSE = "{ctx}I understand you're saying '{msg}'. I'm here to help with various tasks. Could you tell me more specifically what you'd like assistance with?"
+    _TRIGGERS = {
+        "hello": "greet", "hi": "greet",
+        "spreadsheet": "sheet", "excel": "sheet",
+        "help": "help",
+        "pivot": "pivot", "table": "pivot",
+        "formula": "formula", "function": "formula",
+        "chart": "chart", "graph": "chart",
+        "filter": "filter", "sort": "filter",
+    }
+    # One compiled alternation finds any trigger in a single pass over the
+    # message instead of one substring scan per trigger
+    _TRIG_RE = re.compile(
+        r"\b(" + "|".join(_TRIGGERS) + r")\b", re.IGNORECASE
+    )
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _cached_response(user_message: str, screen_context: Optional[str]) -> str:
+        """Compute (and memoize) the simulated response for a message."""
         if screen_context:
             context_prompt = f"User is looking at: {screen_context}. "
         else:
             context_prompt = ""
-        
-        # Simple response logic based on keywords
-        message_lower = user_message.lower()
-        
-        if "hello" in message_lower or "hi" in message_lower:
-            return f"{context_prompt}Hello! I'm your AI assistant. How can I help you today?"
-        
-        elif "spreadsheet" in message_lower or "excel" in message_lower:
-            return f"{context_prompt}I can help you with spreadsheets! What specific task would you like assistance with? I can help with formulas, data analysis, charts, and more."
-        
-        elif "help" in message_lower:
-            return f"{context_prompt}I'm here to help! I can assist with various tasks like spreadsheet work, document creation, data analysis, and more. What would you like to work on?"
-        
-        elif "pivot" in message_lower or "table" in message_lower:
-            return f"{context_prompt}I'll guide you through creating a pivot table. First, select your data including headers. Then go to Insert > PivotTable. Choose where you want it to appear, and drag your fields to the appropriate areas in the PivotTable Fields pane."
-        
-        elif "formula" in message_lower or "function" in message_lower:
-            return f"{context_prompt}I can help you with Excel formulas! What type of calculation are you trying to perform? I can assist with SUM, AVERAGE, VLOOKUP, IF statements, and many other functions."
-        
-        elif "chart" in message_lower or "graph" in message_lower:
-            return f"{context_prompt}Creating charts is easy! Select your data, then go to Insert > Charts. Choose the chart type that best represents your data. I can help you customize colors, labels, and formatting."
-        
-        elif "filter" in message_lower or "sort" in message_lower:
-            return f"{context_prompt}To filter or sort your data, select your data range and go to Data > Filter. This will add filter arrows to your headers. You can also use Data > Sort to arrange your data in a specific order."
-        
-        else:
-            return f"{context_prompt}I understand you're saying '{user_message}'. I'm here to help with various tasks. Could you tell me more specifically what you'd like assistance with?"
+
+        # One DFA pass over the message finds the first trigger word
+        match = SimpleVoiceAgentChat._TRIG_RE.search(user_message)
+        if match:
+            key = SimpleVoiceAgentChat._TRIGGERS[match.group(1).lower()]
+            return SimpleVoiceAgentChat._RESPONSES[key].format(ctx=context_prompt)
+
+        return SimpleVoiceAgentChat._DEFAULT_RESPONSE.format(
+            ctx=context_prompt, msg=user_message
+        )
+
+    def simulate_ai_response(self, user_message: str, screen_context: str = None) -> str:
+        """Simulate AI response based on user input."""
+        # This is a simple simulation - in a real app, this would call the AI API
+        return self._cached_response(user_message, screen_context)
     
     def send_message(self, text: str, screen_context: str = None) -> Optional[Dict[str, Any]]:
         """Send a message to the AI assistant."""
@@ -106,13 +144,12 @@ class SimpleVoiceAgentChat:
         # Simulate AI response
         ai_response = self.simulate_ai_response(text, screen_context)
         
-        # Store conversation
-        self.conversation_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "user": text,
-            "assistant": ai_response,
-            "screen_context": screen_context
-        })
+        # Store conversation; keep the timestamp as a raw nanosecond counter
+        # and only format it when the summary is printed
+        self.hist_ts.append(time.time_ns())
+        self.hist_user.append(text)
+        self.hist_ai.append(ai_response)
+        self.hist_ctx.append(screen_context)
         
         return {
             "action": "text_response",
@@ -120,24 +157,50 @@ class SimpleVoiceAgentChat:
             "text": ai_response
         }
     
+    @property
+    def conversation_history(self) -> list:
+        """Reconstruct the history as dicts for external callers."""
+        return [
+            {"ts_ns": ts, "user": user, "assistant": ai, "screen_context": ctx}
+            for ts, user, ai, ctx in zip(
+                self.hist_ts, self.hist_user, self.hist_ai, self.hist_ctx
+            )
+        ]
+
     def print_conversation_summary(self):
         """Print a summary of the conversation."""
-        if not self.conversation_history:
+        if not self.hist_user:
             print("📝 No conversation history")
             return
-        
-        print("\n" + "="*50)
-        print("📝 CONVERSATION SUMMARY")
-        print("="*50)
-        
-        for i, entry in enumerate(self.conversation_history, 1):
-            print(f"\n{i}. {entry['timestamp']}")
-            print(f"   You: {entry['user']}")
-            if entry.get('screen_context'):
-                print(f"   Screen: {entry['screen_context']}")
-            print(f"   AI: {entry['assistant']}")
-        
-        print(f"\nTotal exchanges: {len(self.conversation_history)}")
+
+        # Build the whole summary once and emit it with a single write
+        # instead of several print() calls (and syscalls) per entry
+        lines = ["\n" + "="*50, "📝 CONVERSATION SUMMARY", "="*50]
+        rows = zip(self.hist_ts, self.hist_user, self.hist_ai, self.hist_ctx)
+        for i, (ts, user, ai, ctx) in enumerate(rows, 1):
+            timestamp = datetime.fromtimestamp(ts / 1e9).isoformat()
+            lines.append(f"\n{i}. {timestamp}")
+            lines.append(f"   You: {user}")
+            if ctx:
+                lines.append(f"   Screen: {ctx}")
+            lines.append(f"   AI: {ai}")
+        lines.append(f"\nTotal exchanges: {len(self.hist_user)}")
+        sys.stdout.write("\n".join(lines) + "\n")
+
+
+def iter_user_input():
+    """Yield user input lines, one per turn.
+
+    Interactive sessions keep the input() prompt; piped input (e.g. a
+    scripted transcript) streams straight from sys.stdin so reads go
+    through the buffered iterator instead of readline per turn.
+    """
+    if sys.stdin.isatty():
+        while True:
+            yield input("\n💬 You: ").strip()
+    else:
+        for raw in sys.stdin:
+            yield raw.strip()
 
 
 def main():
@@ -164,10 +227,7 @@ def main():
     print("(Type your message and press Enter)")
     
     try:
-        while True:
-            # Get user input
-            user_input = input("\n💬 You: ").strip()
-            
+        for user_input in iter_user_input():
             if not user_input:
                 continue
             
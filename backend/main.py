@@ -2,6 +2,8 @@
 Entry point for the Real-time Voice AI Assistant Backend.
 """
 
+from pathlib import Path
+
 import uvicorn
 from src.realtime_assistant_service.core.config import settings
 from src.realtime_assistant_service.core.logging_config import setup_logging
@@ -11,14 +13,34 @@ def main():
     """Main entry point for the application."""
     # Setup logging
     setup_logging()
-    
-    # Start the server
+
+    # In debug mode, scope the reload watcher to the service package so it
+    # doesn't recursively scan the whole backend tree on every tick
+    if settings.debug:
+        reload_kwargs = dict(
+            reload=True,
+            reload_dirs=[str(Path(__file__).parent / "src" / "realtime_assistant_service")],
+            reload_excludes=["*.pyc", "*.log", "__pycache__/*"],
+            reload_delay=0.5,
+        )
+    else:
+        reload_kwargs = dict(reload=False)
+
+    # Start the server with the C-extension event loop and HTTP parser.
+    # loop="auto" picks uvloop where it is installed (everywhere but
+    # Windows, per the dependency marker) and falls back to asyncio
     uvicorn.run(
         "src.realtime_assistant_service.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug,
-        log_level=settings.log_level.lower()
+        log_level=settings.log_level.lower(),
+        loop="auto",
+        http="httptools",
+        # Gemini text frames share most of their envelope bytes, so
+        # per-message deflate pays for itself on the text_response stream;
+        # clients that care about latency can still opt out per-connection
+        ws_per_message_deflate=True,
+        **reload_kwargs
     )
 
 
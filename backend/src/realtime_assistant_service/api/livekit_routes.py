@@ -2,43 +2,159 @@
 LiveKit-based routes for real-time voice AI assistant communication.
 """
 
-import json
+import sys
 import uuid
 import asyncio
-from typing import Dict, Any, Optional
+from typing import Awaitable, Callable, Dict, Any, Optional
 from datetime import datetime, timezone
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from loguru import logger
+from pydantic import TypeAdapter
+import orjson
+import pybase64
 import time
-import hashlib
-import hmac
+from functools import lru_cache
+
+from jose import jwt
 
 from ..models.schemas import (
     StartSessionMessage, AudioInputMessage, ScreenShareFrameMessage,
-    EndSessionMessage, AudioOutputMessage, TextResponseMessage, ErrorMessage,
-    ActionType
+    EndSessionMessage, ErrorMessage, ActionType
 )
 from ..connectors.gemini_live import GeminiLiveConnector
 from ..core.config import settings
 
+# Cached tz singleton for lazy timestamp formatting
+_UTC = timezone.utc
+
+
+@lru_cache(maxsize=256)
+def _err_bytes(code: str, message: str) -> bytes:
+    """Serialize an error frame, caching the bytes per (code, message).
+
+    Dynamic error sites reuse this so repeated failures from the same
+    client hit a cached blob instead of re-encoding.
+    """
+    return orjson.dumps({"action": "error", "code": code, "message": message})
+
+
+# Error frames with fixed content, serialized once at import so the hot
+# paths can send the cached bytes without re-encoding
+_ERR_INVALID_JSON = _err_bytes("INVALID_JSON", "Invalid JSON format")
+_ERR_INTERNAL = _err_bytes("INTERNAL_ERROR", "Internal server error")
+_ERR_AUDIO_PROCESSING = _err_bytes(
+    "AUDIO_PROCESSING_ERROR", "Audio processing failed, please try again")
+_ERR_CRITICAL_AUDIO = _err_bytes(
+    "CRITICAL_AUDIO_ERROR", "Audio processing unavailable, please restart session")
+_ERR_SCREEN_SHARE = _err_bytes(
+    "SCREEN_SHARE_ERROR", "Screen analysis failed, please try again")
+_ERR_CRITICAL_SCREEN = _err_bytes(
+    "CRITICAL_SCREEN_ERROR", "Screen analysis unavailable, please restart session")
+_ERR_INVALID_ACTION = _err_bytes("INVALID_ACTION", "Unknown action")
+
+
+# Schema-directed decoders built once at import: validate_json parses and
+# validates inbound frames in a single pass, skipping the intermediate
+# dict rebuild of Model(**json.loads(...))
+_TA_START = TypeAdapter(StartSessionMessage)
+_TA_AUDIO = TypeAdapter(AudioInputMessage)
+_TA_SCREEN = TypeAdapter(ScreenShareFrameMessage)
+_TA_END = TypeAdapter(EndSessionMessage)
+
+
+class SessionRecord:
+    """Compact per-session bookkeeping record.
+
+    __slots__ gives fixed-offset attribute access and drops the per-dict
+    overhead a plain mapping would carry for every active session.
+    """
+
+    __slots__ = ("room_name", "user_id", "access_token", "start_time_epoch", "status")
+
+    def __init__(self, room_name: str, user_id: str, access_token: str,
+                 start_time_epoch: float, status: str):
+        self.room_name = room_name
+        self.user_id = user_id
+        self.access_token = access_token
+        self.start_time_epoch = start_time_epoch
+        self.status = status
+
 
 class LiveKitConnectionManager:
     """Manages LiveKit connections and sessions."""
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # Bound send_bytes methods, so send_message skips the connection
+        # lookup + attribute resolution on every outbound frame
+        self.senders: Dict[str, Callable[[bytes], Awaitable[None]]] = {}
         self.session_connectors: Dict[str, GeminiLiveConnector] = {}
-        self.room_sessions: Dict[str, Dict[str, Any]] = {}
+        self.room_sessions: Dict[str, SessionRecord] = {}
+        # Per-session outbound queue + writer task so producers (e.g. the
+        # Gemini stream) can run ahead of the socket instead of awaiting
+        # each send inline
+        self.out_queues: Dict[str, asyncio.Queue] = {}
+        self.writer_tasks: Dict[str, asyncio.Task] = {}
+        # Pre-encoded '{"action":"text_response","session_id":...,"text":'
+        # fragment per session; the streaming loops splice the payload in
+        # instead of re-encoding the whole envelope per token
+        self.text_prefix: Dict[str, bytes] = {}
         self.logger = logger.bind(name="LiveKitConnectionManager")
-    
+
     async def connect(self, websocket: WebSocket, session_id: str):
         """Accept a WebSocket connection."""
         await websocket.accept()
         self.active_connections[session_id] = websocket
+        self.senders[session_id] = websocket.send_bytes
+        self.register_writer(session_id, websocket)
         self.logger.info(f"LiveKit WebSocket connected for session {session_id}")
-    
+
+    def register_writer(self, session_id: str, websocket: WebSocket) -> None:
+        """Set up the outbound queue and writer task for a session."""
+        if session_id in self.out_queues:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self.out_queues[session_id] = queue
+        self.writer_tasks[session_id] = asyncio.create_task(
+            self._writer_loop(session_id, websocket, queue)
+        )
+
+    async def _writer_loop(self, session_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain a session's outbound queue onto its WebSocket."""
+        try:
+            while True:
+                payload = await queue.get()
+                await websocket.send_bytes(payload)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error(f"Writer error for session {session_id}: {e}")
+            self.disconnect(session_id)
+
+    async def enqueue(self, session_id: str, payload: bytes) -> bool:
+        """Queue a serialized frame for the session's writer task.
+
+        put_nowait keeps the producer (the Gemini stream) driving between
+        socket writes; we only suspend when the queue is full, which is
+        the backpressure signal that the socket can't keep up.
+        """
+        queue = self.out_queues.get(session_id)
+        if queue is None:
+            return False
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            await queue.put(payload)
+        return True
+
     def disconnect(self, session_id: str):
         """Remove a WebSocket connection."""
+        writer = self.writer_tasks.pop(session_id, None)
+        if writer:
+            writer.cancel()
+        self.out_queues.pop(session_id, None)
+        self.senders.pop(session_id, None)
+        self.text_prefix.pop(session_id, None)
         if session_id in self.active_connections:
             del self.active_connections[session_id]
         if session_id in self.session_connectors:
@@ -49,48 +165,53 @@ class LiveKitConnectionManager:
     
     async def send_message(self, session_id: str, message: Dict[str, Any]):
         """Send a message to a specific WebSocket connection."""
-        if session_id in self.active_connections:
+        send = self.senders.get(session_id)
+        if send:
             try:
-                await self.active_connections[session_id].send_text(json.dumps(message))
+                await send(orjson.dumps(message))
             except Exception as e:
                 self.logger.error(f"Error sending message to session {session_id}: {e}")
                 self.disconnect(session_id)
     
     async def send_error(self, session_id: str, code: str, message: str, details: Dict[str, Any] = None):
         """Send an error message to a WebSocket connection."""
-        error_message = ErrorMessage(
+        # model_construct() skips validation — these fields are
+        # server-built and already trusted, so the coercion pass is pure
+        # overhead
+        error_message = ErrorMessage.model_construct(
             action=ActionType.ERROR,
             session_id=session_id,
             code=code,
             message=message,
             details=details
         )
-        await self.send_message(session_id, error_message.dict())
+        await self.send_message(session_id, error_message.model_dump())
     
     def create_access_token(self, room_name: str, participant_identity: str) -> str:
-        """Create a LiveKit access token using HMAC."""
-        # Create a simple token for demo purposes
-        timestamp = int(time.time())
-        expires = timestamp + 3600  # 1 hour
-        
-        # Create a simple token string
-        token_data = f"{settings.livekit_api_key}:{participant_identity}:{room_name}:{expires}"
-        
-        # Create HMAC signature
-        signature = hmac.new(
-            settings.livekit_api_secret.encode('utf-8'),
-            token_data.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        
-        # Return a simple token format
-        return f"{token_data}:{signature}"
+        """Create a LiveKit access token as a signed JWT."""
+        expires = int(time.time()) + 3600  # 1 hour
+        return jwt.encode(
+            {
+                "iss": settings.livekit_api_key,
+                "sub": participant_identity,
+                "room": room_name,
+                "exp": expires
+            },
+            settings.livekit_api_secret,
+            algorithm="HS256"
+        )
 
 
 # Global connection manager
 manager = LiveKitConnectionManager()
 
 
+async def _send_via_queue(websocket: WebSocket, session_id: str, payload: bytes):
+    """Hand a frame to the session's writer task, or send inline if none."""
+    if not await manager.enqueue(session_id, payload):
+        await websocket.send_bytes(payload)
+
+
 async def livekit_endpoint(websocket: WebSocket):
     """Main LiveKit WebSocket endpoint for real-time communication."""
     session_id = None
@@ -99,60 +220,51 @@ async def livekit_endpoint(websocket: WebSocket):
     try:
         logger.info("New LiveKit WebSocket connection established")
         
-        async for message in websocket.iter_text():
+        # Receive raw bytes: skips Starlette's UTF-8 decode of every frame,
+        # which on base64 audio payloads is a full extra pass over the data
+        async for message in websocket.iter_bytes():
             try:
-                # Parse the message
-                data = json.loads(message)
-                action = data.get("action")
-                
-                if action == ActionType.START_SESSION:
-                    await handle_start_session(websocket, data)
-                    
-                elif action == ActionType.AUDIO_INPUT:
-                    await handle_audio_input(websocket, data)
-                    
-                elif action == ActionType.SCREEN_SHARE_FRAME:
-                    await handle_screen_share_frame(websocket, data)
-                    
-                elif action == ActionType.END_SESSION:
-                    await handle_end_session(websocket, data)
-                    
-                else:
-                    await websocket.send_text(json.dumps({
-                        "action": "error",
-                        "code": "INVALID_ACTION",
-                        "message": f"Unknown action: {action}"
-                    }))
-                    
-            except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
-                    "action": "error",
-                    "code": "INVALID_JSON",
-                    "message": "Invalid JSON format"
-                }))
+                # Peek the action to route, then hand the raw frame to the
+                # matching schema decoder — no intermediate dict rebuild
+                action = orjson.loads(message).get("action")
+
+                handler = _DISPATCH.get(action)
+                if handler is None:
+                    await websocket.send_bytes(_ERR_INVALID_ACTION)
+                    continue
+                # handle_start_session returns the session id so the
+                # endpoint can tear the session down when the socket goes
+                result = await handler(websocket, message)
+                if result is not None:
+                    session_id = result
+
+            except orjson.JSONDecodeError:
+                await websocket.send_bytes(_ERR_INVALID_JSON)
             except Exception as e:
                 logger.error(f"Error processing message: {e}")
-                await websocket.send_text(json.dumps({
-                    "action": "error",
-                    "code": "INTERNAL_ERROR",
-                    "message": "Internal server error"
-                }))
-                
+                await websocket.send_bytes(_ERR_INTERNAL)
+
     except WebSocketDisconnect:
         logger.info(f"LiveKit WebSocket disconnected for session {session_id}")
-        if session_id:
-            manager.disconnect(session_id)
     except Exception as e:
         logger.error(f"LiveKit WebSocket error: {e}")
+    finally:
+        # Always release the session's writer task, queue, and
+        # bookkeeping — otherwise every dropped connection leaks a task
+        # parked on queue.get() plus the closed websocket it holds
         if session_id:
             manager.disconnect(session_id)
 
 
-async def handle_start_session(websocket: WebSocket, data: Dict[str, Any]):
-    """Handle session start request with LiveKit integration."""
+async def handle_start_session(websocket: WebSocket, message: str) -> Optional[str]:
+    """Handle session start request with LiveKit integration.
+
+    Returns the session id on success so the endpoint can clean up the
+    session when the connection drops.
+    """
     try:
         # Validate the message
-        start_message = StartSessionMessage(**data)
+        start_message = _TA_START.validate_json(message)
         
         # Generate session ID if not provided
         session_id = start_message.session_id or str(uuid.uuid4())
@@ -173,16 +285,17 @@ async def handle_start_session(websocket: WebSocket, data: Dict[str, Any]):
         
         # Store the connector and session info
         manager.session_connectors[session_id] = connector
-        manager.room_sessions[session_id] = {
-            "room_name": room_name,
-            "user_id": user_id,
-            "access_token": access_token,
-            "start_time": datetime.now(timezone.utc),
-            "status": "active"
-        }
+        manager.register_writer(session_id, websocket)
+        manager.text_prefix[session_id] = (
+            b'{"action":"text_response","session_id":'
+            + orjson.dumps(session_id) + b',"text":'
+        )
+        manager.room_sessions[session_id] = SessionRecord(
+            room_name, user_id, access_token, time.time(), "active"
+        )
         
         # Send success response with LiveKit info
-        await websocket.send_text(json.dumps({
+        await websocket.send_bytes(orjson.dumps({
             "action": "session_started",
             "session_id": session_id,
             "status": "success",
@@ -195,181 +308,174 @@ async def handle_start_session(websocket: WebSocket, data: Dict[str, Any]):
         }))
         
         logger.info(f"LiveKit session {session_id} started for user {user_id} in room {room_name}")
-        
+        return session_id
+
     except Exception as e:
         logger.error(f"Error starting LiveKit session: {e}")
-        await websocket.send_text(json.dumps({
-            "action": "error",
-            "code": "SESSION_START_ERROR",
-            "message": f"Failed to start session: {str(e)}"
-        }))
+        await websocket.send_bytes(
+            _err_bytes("SESSION_START_ERROR", f"Failed to start session: {str(e)}")
+        )
+        return None
 
 
-async def handle_audio_input(websocket: WebSocket, data: Dict[str, Any]):
+async def handle_audio_input(websocket: WebSocket, message: str):
     """Handle audio input from client via LiveKit."""
     try:
         # Validate the message
-        audio_message = AudioInputMessage(**data)
+        audio_message = _TA_AUDIO.validate_json(message)
         session_id = audio_message.session_id
         
         # Get the connector for this session
         connector = manager.session_connectors.get(session_id)
         if not connector:
-            await websocket.send_text(json.dumps({
-                "action": "error",
-                "code": "SESSION_NOT_FOUND",
-                "message": f"Session {session_id} not found"
-            }))
+            await websocket.send_bytes(
+                _err_bytes("SESSION_NOT_FOUND", f"Session {session_id} not found")
+            )
             return
-        
+
+        # Text-mode frames (the demo chat path) carry the payload
+        # verbatim; only binary formats are base64-encoded on the wire.
+        # Binary payloads are decoded once here at the route boundary
+        # with pybase64's SIMD routines; the connector receives raw bytes
+        if audio_message.format == "text":
+            raw_audio = audio_message.data.encode()
+        else:
+            raw_audio = pybase64.b64decode(audio_message.data, validate=False)
+
         # Process the audio input with error handling
         try:
-            async for response in connector.process_audio_input(audio_message.data, session_id):
+            text_prefix = manager.text_prefix[session_id]
+            async for response in connector.process_audio_input(raw_audio, session_id):
                 if response["type"] == "text_response":
-                    # Send text response
-                    text_message = TextResponseMessage(
-                        action=ActionType.TEXT_RESPONSE,
-                        session_id=session_id,
-                        text=response["content"]
+                    # Splice the payload into the pre-encoded envelope;
+                    # orjson.dumps handles JSON string escaping
+                    await _send_via_queue(
+                        websocket, session_id,
+                        text_prefix + orjson.dumps(response["content"]) + b"}"
                     )
-                    await websocket.send_text(json.dumps(text_message.dict()))
-                    
+
                 elif response["type"] == "audio_response":
                     # Send audio response (placeholder for now)
-                    audio_message = AudioOutputMessage(
-                        action=ActionType.AUDIO_OUTPUT,
-                        session_id=session_id,
-                        data="",  # Placeholder for audio data
-                        format="wav",
-                        sample_rate=16000,
-                        channels=1
-                    )
-                    await websocket.send_text(json.dumps(audio_message.dict()))
-                    
+                    await _send_via_queue(websocket, session_id, orjson.dumps({
+                        "action": "audio_output",
+                        "session_id": session_id,
+                        "data": "",  # Placeholder for audio data
+                        "format": "wav",
+                        "sample_rate": 16000,
+                        "channels": 1
+                    }))
+
                 elif response["type"] == "error":
                     # Handle processing error - default to silence as per Error-Driven Silence principle
                     logger.warning(f"Audio processing error for session {session_id}: {response['error']}")
-                    await websocket.send_text(json.dumps({
-                        "action": "error",
-                        "code": "AUDIO_PROCESSING_ERROR",
-                        "message": "Audio processing failed, please try again"
-                    }))
-                    
+                    await _send_via_queue(websocket, session_id, _ERR_AUDIO_PROCESSING)
+
         except Exception as processing_error:
             # Critical error - default to silence
             logger.error(f"Critical audio processing error for session {session_id}: {processing_error}")
-            await websocket.send_text(json.dumps({
-                "action": "error",
-                "code": "CRITICAL_AUDIO_ERROR",
-                "message": "Audio processing unavailable, please restart session"
-            }))
-                
+            await websocket.send_bytes(_ERR_CRITICAL_AUDIO)
+
     except Exception as e:
         logger.error(f"Error processing audio input: {e}")
-        await websocket.send_text(json.dumps({
-            "action": "error",
-            "code": "AUDIO_PROCESSING_ERROR",
-            "message": f"Failed to process audio: {str(e)}"
-        }))
+        await websocket.send_bytes(
+            _err_bytes("AUDIO_PROCESSING_ERROR", f"Failed to process audio: {str(e)}")
+        )
 
 
-async def handle_screen_share_frame(websocket: WebSocket, data: Dict[str, Any]):
+async def handle_screen_share_frame(websocket: WebSocket, message: str):
     """Handle screen share frame from client via LiveKit."""
     try:
         # Validate the message
-        screen_message = ScreenShareFrameMessage(**data)
+        screen_message = _TA_SCREEN.validate_json(message)
         session_id = screen_message.session_id
         
         # Get the connector for this session
         connector = manager.session_connectors.get(session_id)
         if not connector:
-            await websocket.send_text(json.dumps({
-                "action": "error",
-                "code": "SESSION_NOT_FOUND",
-                "message": f"Session {session_id} not found"
-            }))
+            await websocket.send_bytes(
+                _err_bytes("SESSION_NOT_FOUND", f"Session {session_id} not found")
+            )
             return
-        
+
+        # Decode the base64 frame once at the route boundary
+        raw_frame = pybase64.b64decode(screen_message.data, validate=False)
+
         # Process the screen share frame with error handling
         try:
-            async for response in connector.process_screen_share(screen_message.data, session_id):
+            text_prefix = manager.text_prefix[session_id]
+            async for response in connector.process_screen_share(raw_frame, session_id):
                 if response["type"] == "text_response":
-                    # Send text response
-                    text_message = TextResponseMessage(
-                        action=ActionType.TEXT_RESPONSE,
-                        session_id=session_id,
-                        text=response["content"]
+                    # Splice the payload into the pre-encoded envelope
+                    await _send_via_queue(
+                        websocket, session_id,
+                        text_prefix + orjson.dumps(response["content"]) + b"}"
                     )
-                    await websocket.send_text(json.dumps(text_message.dict()))
-                    
+
                 elif response["type"] == "error":
                     # Handle processing error - default to silence
                     logger.warning(f"Screen share processing error for session {session_id}: {response['error']}")
-                    await websocket.send_text(json.dumps({
-                        "action": "error",
-                        "code": "SCREEN_SHARE_ERROR",
-                        "message": "Screen analysis failed, please try again"
-                    }))
-                    
+                    await _send_via_queue(websocket, session_id, _ERR_SCREEN_SHARE)
+
         except Exception as processing_error:
             # Critical error - default to silence
             logger.error(f"Critical screen share processing error for session {session_id}: {processing_error}")
-            await websocket.send_text(json.dumps({
-                "action": "error",
-                "code": "CRITICAL_SCREEN_ERROR",
-                "message": "Screen analysis unavailable, please restart session"
-            }))
-                
+            await websocket.send_bytes(_ERR_CRITICAL_SCREEN)
+
     except Exception as e:
         logger.error(f"Error processing screen share: {e}")
-        await websocket.send_text(json.dumps({
-            "action": "error",
-            "code": "SCREEN_SHARE_ERROR",
-            "message": f"Failed to process screen share: {str(e)}"
-        }))
+        await websocket.send_bytes(
+            _err_bytes("SCREEN_SHARE_ERROR", f"Failed to process screen share: {str(e)}")
+        )
 
 
-async def handle_end_session(websocket: WebSocket, data: Dict[str, Any]):
+async def handle_end_session(websocket: WebSocket, message: str):
     """Handle session end request."""
     try:
         # Validate the message
-        end_message = EndSessionMessage(**data)
+        end_message = _TA_END.validate_json(message)
         session_id = end_message.session_id
         
         # Get the connector for this session
         connector = manager.session_connectors.get(session_id)
         if not connector:
-            await websocket.send_text(json.dumps({
-                "action": "error",
-                "code": "SESSION_NOT_FOUND",
-                "message": f"Session {session_id} not found"
-            }))
+            await websocket.send_bytes(
+                _err_bytes("SESSION_NOT_FOUND", f"Session {session_id} not found")
+            )
             return
-        
+
         # End the session
         result = await connector.end_session(session_id)
-        
+
         # Clean up LiveKit session
         manager.disconnect(session_id)
-        
+
         # Send success response
-        await websocket.send_text(json.dumps({
+        await websocket.send_bytes(orjson.dumps({
             "action": "session_ended",
             "session_id": session_id,
             "status": "success",
             "message": "Session ended successfully",
             "duration": result.get("duration", 0)
         }))
-        
+
         logger.info(f"LiveKit session {session_id} ended successfully")
-        
+
     except Exception as e:
         logger.error(f"Error ending session: {e}")
-        await websocket.send_text(json.dumps({
-            "action": "error",
-            "code": "SESSION_END_ERROR",
-            "message": f"Failed to end session: {str(e)}"
-        }))
+        await websocket.send_bytes(
+            _err_bytes("SESSION_END_ERROR", f"Failed to end session: {str(e)}")
+        )
+
+
+# Action dispatch table: one hash lookup per inbound frame instead of a
+# string-comparison ladder. Keys are interned so lookups usually resolve
+# on pointer equality.
+_DISPATCH = {
+    sys.intern(ActionType.START_SESSION.value): handle_start_session,
+    sys.intern(ActionType.AUDIO_INPUT.value): handle_audio_input,
+    sys.intern(ActionType.SCREEN_SHARE_FRAME.value): handle_screen_share_frame,
+    sys.intern(ActionType.END_SESSION.value): handle_end_session,
+}
 
 
 # REST API endpoints for LiveKit management
@@ -400,8 +506,12 @@ async def get_session_info(session_id: str):
     
     return {
         "session_id": session_id,
-        "room_name": session_info["room_name"],
-        "user_id": session_info["user_id"],
-        "status": session_info["status"],
-        "start_time": session_info["start_time"].isoformat()
+        "room_name": session_info.room_name,
+        "user_id": session_info.user_id,
+        "status": session_info.status,
+        # Sessions store a raw epoch stamp; build the datetime only when
+        # a caller actually asks for it
+        "start_time": datetime.fromtimestamp(
+            session_info.start_time_epoch, _UTC
+        ).isoformat()
     } 
\ No newline at end of file
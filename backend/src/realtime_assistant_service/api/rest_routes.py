@@ -2,11 +2,16 @@
 REST API routes for management tasks and user operations.
 """
 
+import asyncio
+import time
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError, jwt
 from loguru import logger
+from passlib.context import CryptContext
+import psutil
 from ..models.schemas import (
     UserCreate, UserLogin, UserProfile, Token, SessionInfo,
     ConversationHistory, HealthCheck, MetricsResponse
@@ -16,15 +21,41 @@ from ..core.config import settings
 # Security
 security = HTTPBearer()
 
+# Built once at import: CryptContext construction probes the bcrypt backend
+# and parses the scheme registry, which is wasted work per auth request
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 # Router
 router = APIRouter(prefix="/api/v1", tags=["management"])
 
+# Uptime reference captured at import; monotonic so wall-clock jumps
+# (NTP adjustments) can't produce negative uptime
+_START_TIME = time.monotonic()
+
+# CPU usage is sampled by a background task so /metrics never blocks;
+# psutil.cpu_percent(interval=1) would stall the event loop for a second
+_cpu_sample = {"value": 0.0}
+
+
+async def _cpu_sampler():
+    """Refresh the cached CPU usage reading every couple of seconds."""
+    # Prime psutil's internal counters; the first interval=None call
+    # always returns 0.0
+    psutil.cpu_percent(interval=None)
+    while True:
+        await asyncio.sleep(2.0)
+        _cpu_sample["value"] = psutil.cpu_percent(interval=None)
+
+
+@router.on_event("startup")
+async def _start_cpu_sampler():
+    """Launch the background CPU sampler once the event loop is running."""
+    asyncio.create_task(_cpu_sampler())
+
 
 # Authentication utilities
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
-    from jose import JWTError, jwt
-    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -38,8 +69,6 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token."""
-    from jose import JWTError, jwt
-    
     try:
         payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
         user_id: str = payload.get("sub")
@@ -72,22 +101,23 @@ mock_users = {
     }
 }
 
+# Secondary indexes so login/registration resolve users with O(1) dict
+# lookups instead of scanning the whole table
+_users_by_username: dict = {u["username"]: uid for uid, u in mock_users.items()}
+_users_by_email: dict = {u["email"]: uid for uid, u in mock_users.items()}
+
 
 @router.post("/users/register", response_model=UserProfile)
 async def register_user(user: UserCreate):
     """Register a new user."""
     # Check if user already exists
-    for existing_user in mock_users.values():
-        if existing_user["username"] == user.username or existing_user["email"] == user.email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username or email already registered"
-            )
-    
+    if user.username in _users_by_username or user.email in _users_by_email:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered"
+        )
+
     # Create new user (in real implementation, hash the password)
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    
     user_id = f"user_{len(mock_users) + 1}"
     new_user = {
         "id": user_id,
@@ -101,7 +131,9 @@ async def register_user(user: UserCreate):
     }
     
     mock_users[user_id] = new_user
-    
+    _users_by_username[user.username] = user_id
+    _users_by_email[user.email] = user_id
+
     logger.info(f"New user registered: {user.username}")
     
     return UserProfile(**new_user)
@@ -110,17 +142,11 @@ async def register_user(user: UserCreate):
 @router.post("/users/login", response_model=Token)
 async def login_user(user_credentials: UserLogin):
     """Authenticate user and return access token."""
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    
-    # Find user by username or email
-    user = None
-    for existing_user in mock_users.values():
-        if (existing_user["username"] == user_credentials.username or 
-            existing_user["email"] == user_credentials.username):
-            user = existing_user
-            break
-    
+    # Find user by username or email via the secondary indexes
+    user_id = (_users_by_username.get(user_credentials.username) or
+               _users_by_email.get(user_credentials.username))
+    user = mock_users.get(user_id) if user_id else None
+
     if not user or not pwd_context.verify(user_credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -214,32 +240,20 @@ async def get_session_history(
 @router.get("/health", response_model=HealthCheck)
 async def health_check():
     """Health check endpoint."""
-    import psutil
-    import time
-    
-    # Calculate uptime (simplified)
-    start_time = getattr(health_check, '_start_time', None)
-    if start_time is None:
-        start_time = time.time()
-        health_check._start_time = start_time
-    
-    uptime = time.time() - start_time
-    
     return HealthCheck(
         status="healthy",
         version=settings.app_version,
-        uptime=uptime
+        uptime=time.monotonic() - _START_TIME
     )
 
 
 @router.get("/metrics", response_model=MetricsResponse)
 async def get_metrics():
     """Get system metrics."""
-    import psutil
-    
-    # Get system metrics
+    # Get system metrics; CPU comes from the background sampler so this
+    # route stays non-blocking
     memory = psutil.virtual_memory()
-    cpu_percent = psutil.cpu_percent(interval=1)
+    cpu_percent = _cpu_sample["value"] or psutil.cpu_percent(interval=None)
     
     # Get connection metrics
     # The manager object is no longer imported, so this part of the code will need to be refactored
@@ -3,36 +3,147 @@ Gemini Live API connector for real-time voice AI assistant functionality.
 """
 
 import asyncio
-import base64
-import json
+import random
+import re
 import time
-from typing import Optional, Dict, Any, Callable, AsyncGenerator
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from io import BytesIO
+from typing import Optional, Dict, Any, Callable, AsyncGenerator, Union
 from loguru import logger
+import orjson
+from PIL import Image
 import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
 from google.generativeai.types import GenerateContentResponse
 from ..core.config import settings
 
+# Media payloads arrive as whatever buffer the caller already holds —
+# bytes, a pooled bytearray, or a memoryview slice. The Gemini SDK's
+# protobuf layer accepts only bytes, so non-bytes buffers are
+# snapshotted once at entry; everything upstream stays copy-free.
+BytesLike = Union[bytes, bytearray, memoryview]
+
+# The API key is process-wide SDK state; configure it once at import
+# instead of re-running it in every connector constructor
+genai.configure(api_key=settings.gemini_api_key)
+
+# Complete sentences in streamed text: everything up to and including a
+# terminator, so TTS can start on each sentence as soon as it closes
+_SENTENCE_RE = re.compile(r'[^.!?\n]+[.!?\n]+')
+
+# Flip once _tts produces real audio. While it is a stub, the
+# per-sentence pipeline would only fan out tasks that each emit an
+# empty frame, so replies fall back to the single placeholder frame
+_TTS_READY = False
+
+# Static prompt parts built once at import; rebuilding these dicts per
+# request just allocates and garbage-collects identical objects
+_GREETING_PART = {
+    "text": "You are Cloudy, a helpful AWS expert AI assistant. "
+            "You are having a voice conversation with a user while watching their screen. "
+            "Your primary goal is to provide clear, accurate, and concise verbal guidance on AWS services. "
+            "Start with a friendly greeting and ask how you can help them with their AWS console. "
+            "Keep your response natural and conversational, suitable for voice interaction. "
+            "Do not include markdown or code formatting in your response."
+}
+_AUDIO_SYSTEM_PART = {
+    "text": "You are a helpful AI assistant that provides step-by-step guidance to users. "
+            "Respond naturally and conversationally, focusing on being helpful and clear. "
+            "Keep responses concise but informative."
+}
+_SCREEN_SYSTEM_PART = {
+    "text": "You are a helpful AI assistant that analyzes screen content and provides guidance. "
+            "Look at the screen content and provide helpful, step-by-step instructions "
+            "based on what you see. Be specific and actionable."
+}
+
+# Frames whose dHash differs from the previous one by fewer than this
+# many bits are treated as unchanged and skip the vision call
+_PHASH_THRESHOLD = 5
+
+# Frames at or above this size get hashed in a worker thread; decoding a
+# large JPEG/PNG in Pillow blocks for milliseconds, which is too long to
+# hold the event loop on a voice path. Below it the thread hop costs
+# more than the decode.
+_DHASH_THREAD_BYTES = 16 * 1024
+
+
+def _dhash(image_bytes: BytesLike) -> int:
+    """Compute a 64-bit difference hash of an encoded image.
+
+    Downscales to 9x8 grayscale and packs the horizontal gradient signs;
+    O(72) comparisons, far cheaper than a vision LLM call.
+    """
+    pixels = Image.open(BytesIO(image_bytes)).convert("L").resize((9, 8)).tobytes()
+    value = 0
+    for row in range(8):
+        line = pixels[row * 9:row * 9 + 9]
+        for left, right in zip(line, line[1:]):
+            value = (value << 1) | (left < right)
+    return value
+
+
+@dataclass(slots=True)
+class SessionState:
+    """Per-session conversation state.
+
+    Slotted so many concurrent sessions stay compact; the history columns
+    are the ring buffers described in start_session.
+    """
+
+    id: str
+    user_id: str
+    config: Dict[str, Any]
+    start_time: float
+    start_mono: float
+    status: str = "active"
+    hist_types: deque = field(default_factory=deque)
+    hist_ts: deque = field(default_factory=deque)
+    hist_contents: deque = field(default_factory=deque)
+    end_time: Optional[float] = None
+    # Materialized history export, reused until the next append
+    history_cache: Optional[list] = None
+    # Delta-frame suppression state for screen share
+    last_phash: Optional[int] = None
+    last_screen_reply: Optional[str] = None
+
 
 class GeminiLiveConnector:
-    """Connector for Google Gemini Live API with real-time capabilities."""
-    
+    """Connector for Google Gemini Live API with real-time capabilities.
+
+    One connector can serve many concurrent sessions; all per-session
+    state lives in SessionState records keyed by session id.
+    """
+
+    # Greeting memoized across sessions: the prompt is deterministic, so
+    # one LLM round-trip covers every session start after the first. The
+    # lock keeps a cold-start burst from issuing N identical calls.
+    _cached_greeting: Optional[str] = None
+    _greeting_lock = asyncio.Lock()
+
+    # One model instance shared across connectors; the SDK model object
+    # is stateless per request
+    _shared_model = None
+
     def __init__(self):
         """Initialize the Gemini Live connector."""
-        self.api_key = settings.gemini_api_key
         self.model_name = settings.gemini_model
         self.genai_model = None
-        self.session = None
-        self.is_connected = False
+        self._sessions: Dict[str, SessionState] = {}
+        # Bounded concurrency gate: keeps parallel Gemini calls inside
+        # quota without letting bursts queue up on the thread executor
+        self._sem = asyncio.Semaphore(settings.gemini_concurrency)
         self.logger = logger.bind(name="GeminiLiveConnector")
-        
-        # Configure the API
-        genai.configure(api_key=self.api_key)
-        
+
     async def initialize(self) -> None:
         """Initialize the Gemini model and session."""
         try:
-            self.genai_model = genai.GenerativeModel(self.model_name)
-            self.logger.info(f"Initialized Gemini model: {self.model_name}")
+            if GeminiLiveConnector._shared_model is None:
+                GeminiLiveConnector._shared_model = genai.GenerativeModel(self.model_name)
+                self.logger.info(f"Initialized Gemini model: {self.model_name}")
+            self.genai_model = GeminiLiveConnector._shared_model
         except Exception as e:
             self.logger.error(f"Failed to initialize Gemini model: {e}")
             raise
@@ -40,95 +151,74 @@ class GeminiLiveConnector:
     async def start_session(self, session_id: str, user_id: str, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Start a new conversation session."""
         try:
-            # Create session configuration
-            session_config = {
-                "session_id": session_id,
-                "user_id": user_id,
-                "model": self.model_name,
-                "created_at": time.time(),
-                "config": config or {}
-            }
-            
-            # Initialize conversation history
-            self.session = {
-                "id": session_id,
-                "user_id": user_id,
-                "history": [],
-                "config": config or {},
-                "start_time": time.time(),
-                "status": "active"
-            }
-            
-            self.is_connected = True
+            # Initialize conversation history as parallel ring-buffer
+            # columns instead of a list of per-entry dicts: bounded O(1)
+            # appends, no list-grow reallocations, and worst-case session
+            # memory capped at history_max entries
+            history_max = settings.history_max
+            state = SessionState(
+                id=session_id,
+                user_id=user_id,
+                config=config or {},
+                start_time=time.time(),
+                # Monotonic twin of start_time, used for duration math so
+                # wall-clock adjustments can't skew it
+                start_mono=time.monotonic(),
+                hist_types=deque(maxlen=history_max),
+                hist_ts=deque(maxlen=history_max),
+                hist_contents=deque(maxlen=history_max),
+            )
+            self._sessions[session_id] = state
             self.logger.info(f"Started session {session_id} for user {user_id}")
             
-            # Generate initial greeting
-            greeting_content = [
-                {
-                    "text": "You are Cloudy, a helpful AWS expert AI assistant. "
-                            "You are having a voice conversation with a user while watching their screen. "
-                            "Your primary goal is to provide clear, accurate, and concise verbal guidance on AWS services. "
-                            "Start with a friendly greeting and ask how you can help them with their AWS console. "
-                            "Keep your response natural and conversational, suitable for voice interaction. "
-                            "Do not include markdown or code formatting in your response."
-                }
-            ]
-            
-            greeting_response = await self._generate_content(greeting_content)
-            greeting_text = ""
-            if greeting_response and greeting_response.text:
-                greeting_text = greeting_response.text
+            # Generate initial greeting, reusing the cached text when a
+            # previous session already paid for the LLM round-trip
+            greeting_text = GeminiLiveConnector._cached_greeting or ""
+            if not greeting_text:
+                async with GeminiLiveConnector._greeting_lock:
+                    if GeminiLiveConnector._cached_greeting:
+                        greeting_text = GeminiLiveConnector._cached_greeting
+                    else:
+                        greeting_response = await self._generate_content([_GREETING_PART])
+                        if greeting_response and greeting_response.text:
+                            greeting_text = greeting_response.text
+                            GeminiLiveConnector._cached_greeting = greeting_text
+            if greeting_text:
                 # Add greeting to session history
-                self.session["history"].append({
-                    "type": "assistant_greeting",
-                    "content": greeting_text,
-                    "timestamp": float(time.time()),
-                    "session_id": session_id
-                })
+                self._append_history(state, "assistant_greeting", greeting_text)
             
-            # Create result with safe serialization
-            result = {
+            # All four fields are plain strings, so no serialization
+            # dry-run is needed before handing this back
+            return {
                 "status": "success",
                 "session_id": session_id,
                 "message": "Session started successfully",
                 "greeting": greeting_text or "Hello! I'm Cloudy, your AWS assistant. How can I help you today?"
             }
             
-            # Use safe serialization to validate
-            try:
-                self._safe_json_serialize(result)
-            except Exception as e:
-                self.logger.error(f"JSON serialization error: {e}")
-                # Fallback to safe values
-                result = {
-                    "status": "success",
-                    "session_id": session_id,
-                    "message": "Session started successfully",
-                    "greeting": "Hello! I'm Cloudy, your AWS assistant. How can I help you today?"
-                }
-            
-            return result
-            
         except Exception as e:
             self.logger.error(f"Failed to start session {session_id}: {e}")
             raise
     
-    async def process_audio_input(self, audio_data: str, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Process audio input and generate response."""
+    async def process_audio_input(self, audio_data: BytesLike, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Process audio input and generate response.
+
+        ``audio_data`` is the raw PCM payload; the route layer decodes the
+        base64 transport encoding before calling in.
+        """
+        producer = None
         try:
-            if not self.is_connected or not self.session:
+            state = self._sessions.get(session_id)
+            if state is None or state.status != "active":
                 raise ValueError("No active session")
-            
-            # Decode base64 audio data
-            audio_bytes = base64.b64decode(audio_data)
-            
+
+            # Snapshot non-bytes buffers once; the SDK rejects them
+            if not isinstance(audio_data, bytes):
+                audio_data = bytes(audio_data)
+
             # Create content parts for the model
             content_parts = [
-                {
-                    "text": "You are a helpful AI assistant that provides step-by-step guidance to users. "
-                            "Respond naturally and conversationally, focusing on being helpful and clear. "
-                            "Keep responses concise but informative."
-                },
+                _AUDIO_SYSTEM_PART,
                 {
                     "inline_data": {
                         "mime_type": "audio/wav",
@@ -137,42 +227,99 @@ class GeminiLiveConnector:
                 }
             ]
             
-            # Generate response using Gemini
-            response = await self._generate_content(content_parts)
-            
-            # Process the response
-            if response and response.text:
-                # Add to session history
-                self.session["history"].append({
-                    "type": "user_audio",
-                    "timestamp": float(time.time()),
-                    "session_id": session_id
-                })
-                
-                self.session["history"].append({
-                    "type": "assistant_text",
-                    "content": response.text,
-                    "timestamp": float(time.time()),
-                    "session_id": session_id
-                })
-                
-                # Yield text response
+            # Stream the response: each chunk is yielded as soon as it
+            # arrives, and completed sentences are dispatched to TTS
+            # immediately so first-audio latency tracks the first sentence
+            # instead of the full reply. A bounded queue decouples Gemini
+            # reception from client sends, so a slow websocket doesn't
+            # stall the LLM read until the queue actually fills
+            queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+            producer = asyncio.create_task(self._fill_queue(queue, content_parts))
+            text_parts = []
+            sentence_buf = ""
+            tts_tasks = deque()
+            sequence = 0
+            # Hoist per-chunk attribute lookups out of the loop; these run
+            # once per streamed delta
+            queue_get = queue.get
+            append_text = text_parts.append
+            clock = time.time
+            while True:
+                chunk = await queue_get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                chunk_text = chunk.text if chunk.text else ""
+                if not chunk_text:
+                    continue
+                # One clock read per chunk; every frame emitted this
+                # iteration shares it
+                now = clock()
+                append_text(chunk_text)
                 yield {
                     "type": "text_response",
-                    "content": response.text,
+                    "content": chunk_text,
                     "session_id": session_id,
-                    "timestamp": float(time.time())
+                    "timestamp": now
                 }
-                
-                # TODO: Convert text to speech using Gemini's TTS capabilities
-                # For now, we'll return the text and let the client handle TTS
+
+                # Pipeline completed sentences to TTS while the stream runs
+                if _TTS_READY:
+                    sentence_buf += chunk_text
+                    last_end = 0
+                    for match in _SENTENCE_RE.finditer(sentence_buf):
+                        tts_tasks.append(
+                            (sequence, asyncio.create_task(self._tts(match.group())))
+                        )
+                        sequence += 1
+                        last_end = match.end()
+                    if last_end:
+                        sentence_buf = sentence_buf[last_end:]
+
+                # Flush any audio that finished while we were streaming,
+                # in submission order so the client can play it directly
+                while tts_tasks and tts_tasks[0][1].done():
+                    seq, task = tts_tasks.popleft()
+                    yield {
+                        "type": "audio_response",
+                        "content": task.result(),
+                        "sequence": seq,
+                        "session_id": session_id,
+                        "timestamp": now
+                    }
+
+            if _TTS_READY:
+                # Synthesize any trailing partial sentence
+                if sentence_buf.strip():
+                    tts_tasks.append(
+                        (sequence, asyncio.create_task(self._tts(sentence_buf)))
+                    )
+
+                # Drain the remaining audio in order
+                while tts_tasks:
+                    seq, task = tts_tasks.popleft()
+                    yield {
+                        "type": "audio_response",
+                        "content": await task,
+                        "sequence": seq,
+                        "session_id": session_id,
+                        "timestamp": time.time()
+                    }
+            elif text_parts:
+                # One placeholder frame per reply until synthesis lands
                 yield {
                     "type": "audio_response",
-                    "content": "",  # Placeholder for audio data
+                    "content": "",
+                    "sequence": 0,
                     "session_id": session_id,
-                    "timestamp": float(time.time()),
-                    "note": "Text-to-speech conversion to be implemented"
+                    "timestamp": time.time()
                 }
+
+            if text_parts:
+                # Record history once with the assembled text
+                self._append_history(state, "user_audio", None)
+                self._append_history(state, "assistant_text", "".join(text_parts))
             
         except Exception as e:
             self.logger.error(f"Error processing audio input: {e}")
@@ -180,55 +327,90 @@ class GeminiLiveConnector:
                 "type": "error",
                 "error": str(e),
                 "session_id": session_id,
-                "timestamp": float(time.time())
+                "timestamp": time.time()
             }
+        finally:
+            # Stop the fill task if the consumer bailed early (client
+            # disconnect closes this generator mid-stream)
+            if producer is not None and not producer.done():
+                producer.cancel()
     
-    async def process_screen_share(self, image_data: str, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Process screen share frame and provide context-aware response."""
+    async def process_screen_share(self, image_data: BytesLike, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Process screen share frame and provide context-aware response.
+
+        ``image_data`` is the raw image payload, already base64-decoded by
+        the route layer.
+        """
         try:
-            if not self.is_connected or not self.session:
+            state = self._sessions.get(session_id)
+            if state is None or state.status != "active":
                 raise ValueError("No active session")
-            
-            # Create content parts with image
+
+            # Snapshot non-bytes buffers once; the SDK rejects them
+            if not isinstance(image_data, bytes):
+                image_data = bytes(image_data)
+
+            # Skip the vision call entirely when the frame is effectively
+            # identical to the previous one (static screen content).
+            # Large frames are hashed off-loop; Pillow releases the GIL
+            # during decode, so this overlaps with other coroutines
+            try:
+                if len(image_data) >= _DHASH_THREAD_BYTES:
+                    phash = await asyncio.to_thread(_dhash, image_data)
+                else:
+                    phash = _dhash(image_data)
+            except Exception:
+                phash = None
+            if (phash is not None and state.last_phash is not None
+                    and bin(phash ^ state.last_phash).count('1') < _PHASH_THRESHOLD):
+                if state.last_screen_reply:
+                    yield {
+                        "type": "text_response",
+                        "content": state.last_screen_reply,
+                        "session_id": session_id,
+                        "timestamp": time.time()
+                    }
+                return
+            state.last_phash = phash
+
+            # Create content parts with image; clients may send JPEG
+            # frames (far smaller than PNG for screen content), so sniff
+            # the magic bytes rather than hardcoding PNG
+            mime_type = "image/jpeg" if image_data[:3] == b"\xff\xd8\xff" else "image/png"
             content_parts = [
-                {
-                    "text": "You are a helpful AI assistant that analyzes screen content and provides guidance. "
-                            "Look at the screen content and provide helpful, step-by-step instructions "
-                            "based on what you see. Be specific and actionable."
-                },
+                _SCREEN_SYSTEM_PART,
                 {
                     "inline_data": {
-                        "mime_type": "image/png",
+                        "mime_type": mime_type,
                         "data": image_data
                     }
                 }
             ]
             
-            # Generate response using Gemini
-            response = await self._generate_content(content_parts)
-            
-            if response and response.text:
-                # Add to session history
-                self.session["history"].append({
-                    "type": "screen_share",
-                    "timestamp": float(time.time()),
-                    "session_id": session_id
-                })
-                
-                self.session["history"].append({
-                    "type": "assistant_text",
-                    "content": response.text,
-                    "timestamp": float(time.time()),
-                    "session_id": session_id
-                })
-                
-                # Yield text response
+            # Stream the response chunk by chunk, with the per-chunk
+            # lookups hoisted out of the loop
+            text_parts = []
+            append_text = text_parts.append
+            clock = time.time
+            async for chunk in self._stream_content(content_parts):
+                chunk_text = chunk.text if chunk.text else ""
+                if not chunk_text:
+                    continue
+                append_text(chunk_text)
                 yield {
                     "type": "text_response",
-                    "content": response.text,
+                    "content": chunk_text,
                     "session_id": session_id,
-                    "timestamp": float(time.time())
+                    "timestamp": clock()
                 }
+
+            if text_parts:
+                # Record history once with the assembled text, and keep
+                # the reply around for suppressed duplicate frames
+                full_text = "".join(text_parts)
+                state.last_screen_reply = full_text
+                self._append_history(state, "screen_share", None)
+                self._append_history(state, "assistant_text", full_text)
                 
         except Exception as e:
             self.logger.error(f"Error processing screen share: {e}")
@@ -236,53 +418,166 @@ class GeminiLiveConnector:
                 "type": "error",
                 "error": str(e),
                 "session_id": session_id,
-                "timestamp": float(time.time())
+                "timestamp": time.time()
             }
     
     async def _generate_content(self, content_parts: list) -> Optional[GenerateContentResponse]:
-        """Generate content using the Gemini model."""
+        """Generate content using the Gemini model.
+
+        Calls run under the concurrency semaphore and retry transient
+        quota/availability errors with exponential backoff and jitter.
+        """
+        async with self._sem:
+            for attempt in range(3):
+                try:
+                    # Native async call: no thread handoff per request,
+                    # concurrency bounded only by the semaphore. The
+                    # SDK-side timeout caps how long an abandoned request
+                    # burns quota; wait_for is a slightly later backstop
+                    return await asyncio.wait_for(
+                        self.genai_model.generate_content_async(
+                            content_parts,
+                            stream=False,
+                            request_options={"timeout": settings.gemini_timeout}
+                        ),
+                        timeout=settings.gemini_timeout + 1
+                    )
+                except asyncio.CancelledError:
+                    self.logger.info("Gemini call cancelled by caller")
+                    raise
+                except (ResourceExhausted, ServiceUnavailable) as e:
+                    if attempt == 2:
+                        self.logger.error(f"Error generating content: {e}")
+                        raise
+                    self.logger.warning(
+                        f"Transient Gemini error (attempt {attempt + 1}): {e}"
+                    )
+                    await asyncio.sleep(2 ** attempt + random.random())
+                except Exception as e:
+                    self.logger.error(f"Error generating content: {e}")
+                    raise
+
+    async def _stream_content(self, content_parts: list) -> AsyncGenerator[GenerateContentResponse, None]:
+        """Stream content chunks from the Gemini model.
+
+        Uses the SDK's async API, so chunks arrive on the event loop
+        directly with no per-chunk thread handoff. The semaphore is held
+        for the whole iteration — a stream consumes quota until it is
+        drained — and transient quota/availability errors during stream
+        establishment retry with the same backoff as _generate_content.
+        Once chunks are flowing, errors propagate: replaying a stream
+        mid-reply would duplicate text the caller already yielded.
+        """
+        async with self._sem:
+            try:
+                for attempt in range(3):
+                    try:
+                        response = await asyncio.wait_for(
+                            self.genai_model.generate_content_async(
+                                content_parts,
+                                stream=True,
+                                request_options={"timeout": settings.gemini_timeout}
+                            ),
+                            timeout=settings.gemini_timeout + 1
+                        )
+                        break
+                    except (ResourceExhausted, ServiceUnavailable) as e:
+                        if attempt == 2:
+                            raise
+                        self.logger.warning(
+                            f"Transient Gemini error (attempt {attempt + 1}): {e}"
+                        )
+                        await asyncio.sleep(2 ** attempt + random.random())
+                async for chunk in response:
+                    yield chunk
+            except asyncio.CancelledError:
+                self.logger.info("Gemini stream cancelled by caller")
+                raise
+            except Exception as e:
+                self.logger.error(f"Error streaming content: {e}")
+                raise
+
+    async def _fill_queue(self, queue: asyncio.Queue, content_parts: list) -> None:
+        """Feed streamed chunks into a bounded queue.
+
+        Producer half of the stream/send decoupling in
+        process_audio_input: None marks end-of-stream, and a raised
+        exception is forwarded through the queue so the consumer can
+        re-raise it in its own context.
+        """
         try:
-            response = await asyncio.to_thread(
-                self.genai_model.generate_content,
-                content_parts,
-                stream=False
-            )
-            return response
-        except Exception as e:
-            self.logger.error(f"Error generating content: {e}")
+            async for chunk in self._stream_content(content_parts):
+                await queue.put(chunk)
+            await queue.put(None)
+        except asyncio.CancelledError:
             raise
+        except Exception as e:
+            await queue.put(e)
 
-    def _safe_json_serialize(self, obj):
-        """Safely serialize objects to JSON, handling datetime and other non-serializable types."""
-        import json
-        from datetime import datetime
-        
-        def convert(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            elif hasattr(obj, '__dict__'):
-                return obj.__dict__
-            elif hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, bytearray)):
-                if isinstance(obj, dict):
-                    return {k: convert(v) for k, v in obj.items()}
-                else:
-                    return [convert(item) for item in obj]
-            else:
-                return obj
-        
-        try:
-            converted = convert(obj)
-            # Test serialization
-            json.dumps(converted)
-            return converted
-        except (TypeError, ValueError) as e:
-            self.logger.error(f"JSON serialization error: {e}")
-            # Return a safe fallback
-            return {"text": str(obj) if obj else ""}
+    def _append_history(self, state: SessionState, entry_type: str, content: Optional[str]) -> None:
+        """Append one entry to a session's columnar history."""
+        state.hist_types.append(entry_type)
+        state.hist_ts.append(time.time())
+        state.hist_contents.append(content)
+        state.history_cache = None
+
+    async def _tts(self, sentence: str) -> str:
+        """Synthesize speech for a single sentence.
+
+        TODO: wire up Gemini's TTS capabilities. Returns an empty audio
+        payload for now so the sentence-level pipeline is already in
+        place when synthesis lands.
+        """
+        return ""
+
+    @staticmethod
+    def _json_default(obj):
+        """Fallback encoder for types orjson doesn't handle natively."""
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if hasattr(obj, '__dict__'):
+            return obj.__dict__
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def _safe_json_bytes(self, obj) -> bytes:
+        """Serialize an object to JSON bytes in one C-level pass.
+
+        Replaces the old recursive copy-then-dumps walk; orjson encodes
+        directly and the default= hook covers datetimes and plain objects.
+        """
+        return orjson.dumps(obj, default=self._json_default)
 
     def _serialize_response(self, response: GenerateContentResponse) -> Dict[str, Any]:
-        """Serialize Gemini response to JSON-safe format."""
+        """Serialize Gemini response to JSON-safe format.
+
+        The dominant shape is a single candidate with text-only parts, so
+        that case is a straight attribute walk; anything else falls back
+        to the defensive generic path.
+        """
         try:
+            # Hoist the metadata attribute lookups out of the dict build
+            usage = response.usage_metadata
+            usage_dict = {
+                "prompt_token_count": usage.prompt_token_count,
+                "candidates_token_count": usage.candidates_token_count,
+                "total_token_count": usage.total_token_count
+            } if usage else {}
+
+            candidates = response.candidates
+            if candidates and len(candidates) == 1:
+                parts = candidates[0].content.parts
+                if all(hasattr(part, 'text') for part in parts):
+                    # Fast path: one candidate, text-only parts
+                    return {
+                        "text": response.text,
+                        "candidates": [{
+                            "content": {
+                                "parts": [{"text": part.text} for part in parts]
+                            }
+                        }],
+                        "usage_metadata": usage_dict
+                    }
+
             return {
                 "text": response.text,
                 "candidates": [
@@ -294,13 +589,9 @@ class GeminiLiveConnector:
                                 } for part in candidate.content.parts
                             ]
                         }
-                    } for candidate in response.candidates
-                ] if response.candidates else [],
-                "usage_metadata": {
-                    "prompt_token_count": response.usage_metadata.prompt_token_count if response.usage_metadata else 0,
-                    "candidates_token_count": response.usage_metadata.candidates_token_count if response.usage_metadata else 0,
-                    "total_token_count": response.usage_metadata.total_token_count if response.usage_metadata else 0
-                } if response.usage_metadata else {}
+                    } for candidate in candidates
+                ] if candidates else [],
+                "usage_metadata": usage_dict
             }
         except Exception as e:
             self.logger.error(f"Error serializing response: {e}")
@@ -309,18 +600,18 @@ class GeminiLiveConnector:
     async def end_session(self, session_id: str) -> Dict[str, Any]:
         """End the current session."""
         try:
-            if self.session and self.session["id"] == session_id:
-                self.session["status"] = "ended"
-                self.session["end_time"] = time.time()
-                self.is_connected = False
-                
+            state = self._sessions.get(session_id)
+            if state is not None and state.status == "active":
+                state.status = "ended"
+                state.end_time = time.time()
+
                 self.logger.info(f"Ended session {session_id}")
-                
+
                 return {
                     "status": "success",
                     "session_id": session_id,
                     "message": "Session ended successfully",
-                    "duration": float(self.session["end_time"] - self.session["start_time"])
+                    "duration": time.monotonic() - state.start_mono
                 }
             else:
                 raise ValueError(f"Session {session_id} not found or already ended")
@@ -331,39 +622,55 @@ class GeminiLiveConnector:
     
     def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get information about the current session."""
-        if self.session and self.session["id"] == session_id:
+        state = self._sessions.get(session_id)
+        if state is not None:
             # Ensure all values are JSON serializable
             session_info = {
                 "session_id": session_id,
-                "user_id": self.session["user_id"],
-                "status": self.session["status"],
-                "start_time": float(self.session["start_time"]),
-                "history_count": len(self.session["history"]),
-                "config": self.session["config"]
+                "user_id": state.user_id,
+                "status": state.status,
+                "start_time": float(state.start_time),
+                "history_count": len(state.hist_types),
+                "config": state.config
             }
-            
+
             # Add end_time if it exists
-            if self.session.get("end_time"):
-                session_info["end_time"] = float(self.session["end_time"])
-            
+            if state.end_time:
+                session_info["end_time"] = float(state.end_time)
+
             return session_info
         return None
     
     def get_session_history(self, session_id: str) -> list:
-        """Get the conversation history for a session."""
-        if self.session and self.session["id"] == session_id:
-            # Ensure all timestamps are JSON serializable
+        """Get the conversation history for a session.
+
+        The columnar storage is materialized into per-entry dicts only
+        here, at export time, and the result is cached until the next
+        append so repeated fetches don't redo the O(N) rebuild.
+        """
+        state = self._sessions.get(session_id)
+        if state is not None:
+            if state.history_cache is not None:
+                return state.history_cache
             history = []
-            for entry in self.session["history"]:
-                serialized_entry = entry.copy()
-                if "timestamp" in serialized_entry:
-                    serialized_entry["timestamp"] = float(serialized_entry["timestamp"])
-                history.append(serialized_entry)
+            for entry_type, timestamp, content in zip(
+                state.hist_types,
+                state.hist_ts,
+                state.hist_contents,
+            ):
+                entry = {
+                    "type": entry_type,
+                    "timestamp": timestamp,
+                    "session_id": session_id
+                }
+                if content is not None:
+                    entry["content"] = content
+                history.append(entry)
+            state.history_cache = history
             return history
         return []
-    
+
     def is_session_active(self, session_id: str) -> bool:
         """Check if a session is active."""
-        return (self.session and 
-                self.session["id"] == session_id and 
-                self.session["status"] == "active") 
\ No newline at end of file
+        state = self._sessions.get(session_id)
+        return state is not None and state.status == "active"
\ No newline at end of file
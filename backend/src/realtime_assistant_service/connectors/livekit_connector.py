@@ -4,16 +4,57 @@ Handles LiveKit room management, media streaming, and AI integration
 """
 
 import asyncio
-import base64
-import json
 import time
-from typing import Dict, Any, Optional, List, Callable, AsyncGenerator
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Callable, AsyncGenerator, Mapping
 from loguru import logger
 import aiohttp
-from livekit import rtc
+import numpy as np
+import orjson
+from livekit import AccessToken, rtc
 from livekit.rtc import Room, Participant, Track, DataPacketKind
 from ..core.config import settings
-from .gemini_live import GeminiLiveConnector
+from .gemini_live import BytesLike, GeminiLiveConnector
+
+# Monotonic clock bound once at module level: immune to wall-clock
+# jumps and skips the attribute resolution in tight loops. Wall-clock
+# time.time() remains only in values serialized for clients.
+_now = time.monotonic
+
+# Audio chunks are coalesced until either this many bytes accumulate or
+# the deadline elapses, so each downstream call works on one sizable
+# buffer instead of a ~100ms sliver
+_AUDIO_BATCH_BYTES = 64 * 1024
+_AUDIO_BATCH_DEADLINE = 0.2
+
+# Upper bound on idle buffers kept per pool; beyond this they are left
+# to the allocator rather than hoarded
+_BUFFER_POOL_SIZE = 8
+
+# Fixed number of coroutines draining the room-event queue; bounds Task
+# churn no matter how fast events arrive
+_EVENT_WORKERS = 8
+
+# 16-bit PCM chunks whose samples all sit inside this amplitude band are
+# treated as silence and skipped before any Gemini work
+_SILENCE_THRESHOLD = 300
+
+# Outbound AI tokens are coalesced for this long before one batched
+# publish_data call; each call is a Python->Rust FFI crossing plus an
+# SCTP send, so batching cuts that overhead by the tokens-per-window
+# factor while staying imperceptible next to speech latency
+_SEND_FLUSH_INTERVAL = 0.025
+
+
+@dataclass(slots=True)
+class Session:
+    """Per-session bookkeeping, slotted to keep many sessions compact."""
+
+    user_id: str
+    start_time: float
+    config: Dict[str, Any] = field(default_factory=dict)
+    status: str = "active"
 
 
 class LiveKitConnector:
@@ -27,7 +68,20 @@ class LiveKitConnector:
         self.room: Optional[Room] = None
         self.gemini_connector: Optional[GeminiLiveConnector] = None
         self.is_connected = False
-        self.active_sessions: Dict[str, Dict[str, Any]] = {}
+        self.active_sessions: Dict[str, Session] = {}
+        # Recycled batch buffers for the audio path; checkout on batch
+        # start, return after the downstream call finishes with it
+        self._audio_pool: List[bytearray] = []
+        # (room, identity) -> (jwt, expiry); tokens are reused until
+        # shortly before expiry instead of re-running HMAC signing
+        self._token_cache: Dict[tuple, tuple] = {}
+        # Room events are queued and drained by a fixed worker pool
+        # instead of spawning one Task per event
+        self._event_queue: asyncio.Queue = asyncio.Queue(maxsize=1024)
+        self._workers: List[asyncio.Task] = []
+        # Per-session outbound token buffers drained by _flush_loop
+        self._send_queue: Dict[str, List[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
         self.logger = logger.bind(name="LiveKitConnector")
         
         # AI participant identity
@@ -38,6 +92,11 @@ class LiveKitConnector:
         try:
             self.gemini_connector = GeminiLiveConnector()
             await self.gemini_connector.initialize()
+            self._workers = [
+                asyncio.create_task(self._event_worker())
+                for _ in range(_EVENT_WORKERS)
+            ]
+            self._flush_task = asyncio.create_task(self._flush_loop())
             self.logger.info("LiveKit connector initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize LiveKit connector: {e}")
@@ -95,17 +154,30 @@ class LiveKitConnector:
             self.logger.error(f"Failed to join room {room_name} as AI: {e}")
             raise
     
-    async def process_user_audio(self, audio_data: bytes, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Process user audio through Gemini and generate AI response."""
+    async def process_user_audio(self, audio_data: BytesLike, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Process user audio through Gemini and generate AI response.
+
+        ``audio_data`` may be any bytes-like buffer (pooled bytearrays
+        and memoryview slices included); it is never copied here, so the
+        caller must keep it untouched until this generator completes.
+        """
         try:
             if not self.gemini_connector:
                 raise ValueError("Gemini connector not initialized")
-            
-            # Convert audio to base64
-            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-            
-            # Process with Gemini
-            async for response in self.gemini_connector.process_audio_input(audio_base64, session_id):
+
+            # Short-circuit dead air: one SIMD min/max sweep over the
+            # samples is orders of magnitude cheaper than the Gemini
+            # round-trip it avoids, and silence dominates real speech
+            samples = np.frombuffer(audio_data, dtype=np.int16,
+                                    count=len(audio_data) // 2)
+            if (samples.size == 0
+                    or (-_SILENCE_THRESHOLD < int(samples.min())
+                        and int(samples.max()) < _SILENCE_THRESHOLD)):
+                return
+
+            # Pass raw bytes straight through; the Gemini connector takes
+            # the payload as-is, so there is nothing to base64-encode here
+            async for response in self.gemini_connector.process_audio_input(audio_data, session_id):
                 if response.get("type") == "text_response":
                     # Send text response via data channel
                     await self._send_ai_response(response["content"], session_id)
@@ -120,17 +192,19 @@ class LiveKitConnector:
                 "timestamp": time.time()
             }
     
-    async def process_screen_share(self, image_data: bytes, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Process screen share frame through Gemini."""
+    async def process_screen_share(self, image_data: BytesLike, session_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """Process screen share frame through Gemini.
+
+        ``image_data`` may be any bytes-like buffer; same liveness
+        contract as process_user_audio.
+        """
         try:
             if not self.gemini_connector:
                 raise ValueError("Gemini connector not initialized")
             
-            # Convert image to base64
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-            
-            # Process with Gemini
-            async for response in self.gemini_connector.process_screen_share(image_base64, session_id):
+            # Pass raw bytes straight through; the Gemini connector takes
+            # the payload as-is, so there is nothing to base64-encode here
+            async for response in self.gemini_connector.process_screen_share(image_data, session_id):
                 if response.get("type") == "text_response":
                     # Send text response via data channel
                     await self._send_ai_response(response["content"], session_id)
@@ -155,12 +229,11 @@ class LiveKitConnector:
             result = await self.gemini_connector.start_session(session_id, user_id, config)
             
             # Store session info
-            self.active_sessions[session_id] = {
-                "user_id": user_id,
-                "start_time": time.time(),
-                "config": config or {},
-                "status": "active"
-            }
+            self.active_sessions[session_id] = Session(
+                user_id=user_id,
+                start_time=time.time(),
+                config=config or {}
+            )
             
             self.logger.info(f"Started session {session_id} for user {user_id}")
             return result
@@ -189,19 +262,68 @@ class LiveKitConnector:
             self.logger.error(f"Failed to end session {session_id}: {e}")
             raise
     
-    async def disconnect(self) -> None:
-        """Disconnect from LiveKit room."""
+    async def leave_room(self) -> None:
+        """Leave the current room without tearing down the connector.
+
+        Ending one session must not cancel the worker pool and flush
+        loop that other sessions share; full teardown is disconnect().
+        """
         if self.room:
             await self.room.disconnect()
             self.room = None
             self.is_connected = False
-            self.logger.info("Disconnected from LiveKit room")
+            self.logger.info("Left LiveKit room")
+
+    async def disconnect(self) -> None:
+        """Disconnect from LiveKit and stop the connector's tasks."""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._send_queue.clear()
+        await self.leave_room()
+
+    def _dispatch_event(self, kind: str, *args: Any) -> None:
+        """Queue a room event for the worker pool.
+
+        Synchronous (called from SDK callbacks); drops with a warning
+        when the queue is full so a flood degrades to lost events rather
+        than unbounded memory.
+        """
+        try:
+            self._event_queue.put_nowait((kind, args))
+        except asyncio.QueueFull:
+            self.logger.warning(f"Event queue full; dropping {kind} event")
+
+    async def _event_worker(self) -> None:
+        """Drain the room-event queue; one of a fixed pool."""
+        while True:
+            kind, args = await self._event_queue.get()
+            try:
+                if kind == "data":
+                    await self._process_data_message(*args)
+                elif kind == "media":
+                    await self._handle_user_media(*args)
+            except Exception as e:
+                self.logger.error(f"Error handling {kind} event: {e}")
+            finally:
+                self._event_queue.task_done()
     
     def _generate_access_token(self, room_name: str, participant_identity: str) -> str:
-        """Generate LiveKit access token."""
+        """Generate LiveKit access token, reusing unexpired cached tokens.
+
+        create_room and join_room_as_ai both sign for the same (room,
+        identity) pairs; within the 1-hour TTL the cached JWT is returned
+        with a 60-second skew margin rather than re-signing.
+        """
+        cache_key = (room_name, participant_identity)
+        cached = self._token_cache.get(cache_key)
+        if cached is not None and cached[1] - 60 > _now():
+            return cached[0]
+
         try:
-            from livekit import AccessToken
-            
             token = AccessToken()
             token.add_grant(
                 room_join=True,
@@ -214,38 +336,37 @@ class LiveKitConnector:
             )
             token.identity = participant_identity
             token.ttl = 3600  # 1 hour
-            
-            return token.to_jwt(self.livekit_api_key, self.livekit_api_secret)
-            
+
+            jwt_token = token.to_jwt(self.livekit_api_key, self.livekit_api_secret)
+            self._token_cache[cache_key] = (jwt_token, _now() + 3600)
+            return jwt_token
+
         except Exception as e:
             self.logger.error(f"Failed to generate access token: {e}")
             raise
     
     def _setup_room_event_listeners(self) -> None:
-        """Set up LiveKit room event listeners."""
+        """Set up LiveKit room event listeners.
+
+        One dispatch table drives registration. The SDK's emitter has no
+        wildcard listener, so each pair is still registered with .on(),
+        but the bound methods are resolved once here rather than being
+        re-looked-up anywhere else.
+        """
         if not self.room:
             return
-        
-        # Participant connected
-        self.room.on("participant_connected", self._on_participant_connected)
-        
-        # Participant disconnected
-        self.room.on("participant_disconnected", self._on_participant_disconnected)
-        
-        # Track published
-        self.room.on("track_published", self._on_track_published)
-        
-        # Track unpublished
-        self.room.on("track_unpublished", self._on_track_unpublished)
-        
-        # Data received
-        self.room.on("data_received", self._on_data_received)
-        
-        # Connected
-        self.room.on("connected", self._on_connected)
-        
-        # Disconnected
-        self.room.on("disconnected", self._on_disconnected)
+
+        handlers = {
+            "participant_connected": self._on_participant_connected,
+            "participant_disconnected": self._on_participant_disconnected,
+            "track_published": self._on_track_published,
+            "track_unpublished": self._on_track_unpublished,
+            "data_received": self._on_data_received,
+            "connected": self._on_connected,
+            "disconnected": self._on_disconnected,
+        }
+        for event_name, handler in handlers.items():
+            self.room.on(event_name, handler)
     
     def _on_participant_connected(self, participant: Participant) -> None:
         """Handle participant connected event."""
@@ -261,7 +382,7 @@ class LiveKitConnector:
         
         # Handle user audio/video tracks
         if participant.identity != self.ai_identity:
-            asyncio.create_task(self._handle_user_media(publication, participant))
+            self._dispatch_event("media", publication, participant)
     
     def _on_track_unpublished(self, publication: rtc.TrackPublication, participant: Participant) -> None:
         """Handle track unpublished event."""
@@ -270,11 +391,17 @@ class LiveKitConnector:
     def _on_data_received(self, payload: bytes, participant: Participant) -> None:
         """Handle data received event."""
         try:
-            data = json.loads(payload.decode('utf-8'))
-            self.logger.info(f"Data received from {participant.identity}: {data}")
-            
+            # orjson parses bytes directly; no intermediate str
+            data = orjson.loads(payload)
+            # debug + lazy: no formatting work at all per packet unless
+            # the sink actually wants DEBUG
+            self.logger.opt(lazy=True).debug(
+                "Data received from {}: {}",
+                lambda: participant.identity, lambda: data
+            )
+
             # Handle different data types
-            asyncio.create_task(self._process_data_message(data, participant))
+            self._dispatch_event("data", data, participant)
             
         except Exception as e:
             self.logger.error(f"Error processing data message: {e}")
@@ -323,13 +450,40 @@ class LiveKitConnector:
             if not session_id:
                 return
             
-            # Process audio chunks
+            # Coalesce small chunks into batches before handing off, so
+            # per-call overhead is amortized over a large buffer. Batch
+            # buffers come from the pool and are recycled once the
+            # downstream call is done with them — no per-batch malloc.
+            # The handoff snapshots the buffer to bytes: the Gemini
+            # SDK's protobuf layer rejects bytearray, and the copy also
+            # lets the buffer be recycled while downstream still reads
+            buf = self._acquire_buffer(self._audio_pool)
+            deadline = _now() + _AUDIO_BATCH_DEADLINE
             async for audio_chunk in self._get_audio_chunks(track):
-                async for response in self.process_user_audio(audio_chunk, session_id):
+                buf += audio_chunk
+                if len(buf) < _AUDIO_BATCH_BYTES and _now() < deadline:
+                    continue
+                batch = bytes(buf)
+                self._release_buffer(self._audio_pool, buf)
+                buf = self._acquire_buffer(self._audio_pool)
+                deadline = _now() + _AUDIO_BATCH_DEADLINE
+                async for response in self.process_user_audio(batch, session_id):
                     # Handle response
                     if response.get("type") == "text_response":
-                        self.logger.info(f"AI response: {response['content']}")
-                        
+                        self.logger.opt(lazy=True).debug(
+                            "AI response: {}", lambda: response["content"]
+                        )
+
+            # Flush whatever was buffered when the track ended
+            if buf:
+                batch = bytes(buf)
+                async for response in self.process_user_audio(batch, session_id):
+                    if response.get("type") == "text_response":
+                        self.logger.opt(lazy=True).debug(
+                            "AI response: {}", lambda: response["content"]
+                        )
+            self._release_buffer(self._audio_pool, buf)
+
         except Exception as e:
             self.logger.error(f"Error processing audio track: {e}")
     
@@ -346,7 +500,9 @@ class LiveKitConnector:
                 async for response in self.process_screen_share(frame_data, session_id):
                     # Handle response
                     if response.get("type") == "text_response":
-                        self.logger.info(f"AI response to screen share: {response['content']}")
+                        self.logger.opt(lazy=True).debug(
+                            "AI response to screen share: {}", lambda: response["content"]
+                        )
                         
         except Exception as e:
             self.logger.error(f"Error processing video track: {e}")
@@ -382,38 +538,63 @@ class LiveKitConnector:
             self.logger.error(f"Error processing data message: {e}")
     
     async def _send_ai_response(self, text: str, session_id: str) -> None:
-        """Send AI response to all participants in the room."""
+        """Queue an AI response token for the batched data-channel send.
+
+        Tokens are buffered per session and flushed by _flush_loop every
+        _SEND_FLUSH_INTERVAL as one ai_response packet, so a token
+        stream costs one publish_data per window instead of per token.
+        """
         if not self.room:
             return
-        
-        try:
-            response_data = {
-                "type": "ai_response",
-                "text": text,
-                "session_id": session_id,
-                "timestamp": time.time()
-            }
-            
-            # Send to all participants
-            await self.room.local_participant.publish_data(
-                json.dumps(response_data).encode('utf-8'),
-                DataPacketKind.RELIABLE
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Error sending AI response: {e}")
+        self._send_queue.setdefault(session_id, []).append(text)
+
+    async def _flush_loop(self) -> None:
+        """Drain the per-session token buffers into batched sends."""
+        while True:
+            await asyncio.sleep(_SEND_FLUSH_INTERVAL)
+            if not self._send_queue or not self.room:
+                continue
+            pending, self._send_queue = self._send_queue, {}
+            for session_id, tokens in pending.items():
+                try:
+                    # Joined tokens keep the wire shape the frontend
+                    # already parses (type ai_response + text); the
+                    # coalescing win is the same either way
+                    await self.room.local_participant.publish_data(
+                        orjson.dumps({
+                            "type": "ai_response",
+                            "text": "".join(tokens),
+                            "session_id": session_id,
+                            "timestamp": time.time()
+                        }),
+                        DataPacketKind.RELIABLE
+                    )
+                except Exception as e:
+                    self.logger.error(f"Error sending AI response: {e}")
     
     async def _send_data_to_participant(self, participant: Participant, data: Dict[str, Any]) -> None:
         """Send data to a specific participant."""
         try:
             await self.room.local_participant.publish_data(
-                json.dumps(data).encode('utf-8'),
+                orjson.dumps(data),
                 DataPacketKind.RELIABLE,
                 destination_identities=[participant.identity]
             )
         except Exception as e:
             self.logger.error(f"Error sending data to participant: {e}")
     
+    @staticmethod
+    def _acquire_buffer(pool: List[bytearray]) -> bytearray:
+        """Take a reusable buffer from a pool, or allocate a fresh one."""
+        return pool.pop() if pool else bytearray()
+
+    @staticmethod
+    def _release_buffer(pool: List[bytearray], buf: bytearray) -> None:
+        """Return a buffer to its pool, keeping its capacity for reuse."""
+        if len(pool) < _BUFFER_POOL_SIZE:
+            buf.clear()
+            pool.append(buf)
+
     def _get_session_id_from_participant(self, participant_identity: str) -> Optional[str]:
         """Extract session ID from participant identity or metadata."""
         # For now, use participant identity as session ID
@@ -438,9 +619,13 @@ class LiveKitConnector:
             await asyncio.sleep(0.1)
             yield b"video_frame_data"
     
-    def get_active_sessions(self) -> Dict[str, Dict[str, Any]]:
-        """Get all active sessions."""
-        return self.active_sessions.copy()
+    def get_active_sessions(self) -> Mapping[str, Session]:
+        """Get a read-only live view of all active sessions.
+
+        O(1) — no per-call copy; the view tracks the underlying dict.
+        Callers wanting a point-in-time snapshot can dict() it.
+        """
+        return MappingProxyType(self.active_sessions)
     
     def is_session_active(self, session_id: str) -> bool:
         """Check if a session is active."""
@@ -2,6 +2,7 @@
 Configuration settings for the Real-time Voice AI Assistant Service.
 """
 
+from dataclasses import make_dataclass
 from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -22,6 +23,9 @@ class Settings(BaseSettings):
     # Gemini Live API settings
     gemini_api_key: str = Field(..., env="GEMINI_API_KEY")
     gemini_model: str = Field(default="gemini-1.5-flash", env="GEMINI_MODEL")
+    gemini_concurrency: int = Field(default=8, env="GEMINI_CONCURRENCY")
+    gemini_timeout: float = Field(default=60.0, env="GEMINI_TIMEOUT")
+    history_max: int = Field(default=1024, env="HISTORY_MAX")
     
     # LiveKit settings
     livekit_url: str = Field(default="ws://localhost:7880", env="LIVEKIT_URL")
@@ -50,6 +54,10 @@ class Settings(BaseSettings):
         env="LOG_FORMAT"
     )
     
+    # Session settings
+    max_sessions: int = Field(default=1000, env="MAX_SESSIONS")
+    session_ttl_seconds: int = Field(default=3600, env="SESSION_TTL_SECONDS")
+
     # WebSocket settings
     max_connections: int = Field(default=1000, env="MAX_CONNECTIONS")
     ping_interval: int = Field(default=20, env="PING_INTERVAL")
@@ -72,5 +80,18 @@ class Settings(BaseSettings):
     }
 
 
+# Env loading and validation happen once here; the pydantic model is
+# then flattened into a frozen slots dataclass so every later
+# settings.<field> read is a raw slot lookup instead of going through
+# model machinery, and nothing can mutate config at runtime.
+_validated = Settings()
+
+_FrozenSettings = make_dataclass(
+    "_FrozenSettings",
+    [(name, object) for name in Settings.model_fields],
+    frozen=True,
+    slots=True,
+)
+
 # Global settings instance
-settings = Settings() 
\ No newline at end of file
+settings = _FrozenSettings(**_validated.model_dump())
\ No newline at end of file
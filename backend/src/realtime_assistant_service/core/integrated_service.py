@@ -3,16 +3,47 @@ Integrated service combining LiveKit for media transport and Gemini for AI proce
 """
 
 import asyncio
-import base64
-import json
+import inspect
 import time
-from typing import Optional, Dict, Any, Callable, AsyncGenerator
+from collections import ChainMap
+from typing import Optional, Dict, Any, Callable, AsyncGenerator, List, Mapping
+from cachetools import TTLCache
 from loguru import logger
 
 from .config import settings
 from ..connectors.livekit_connector import LiveKitConnector
 from ..connectors.gemini_live import GeminiLiveConnector
 
+# Streamed text deltas are buffered for this long before one coalesced
+# on_text_response call; Gemini emits word-level chunks far faster than
+# clients need individual frames for
+_TEXT_FLUSH_INTERVAL = 0.02
+
+
+class _SessionCache(TTLCache):
+    """TTLCache that reports evictions so session side state can be freed.
+
+    cachetools drops entries silently on TTL expiry and size pressure;
+    without a hook the connected set, user index, consumer task, and any
+    pending flush timer would outlive the record they belong to.
+    """
+
+    def __init__(self, maxsize: int, ttl: float,
+                 on_evict: Callable[[str, Dict[str, Any]], None]):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(key, value)
+        return key, value
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for key, value in expired:
+            self._on_evict(key, value)
+        return expired
+
 
 class IntegratedVoiceAIService:
     """Integrated service combining LiveKit and Gemini for real-time voice AI."""
@@ -23,14 +54,36 @@ class IntegratedVoiceAIService:
         self.gemini_connector = GeminiLiveConnector()
         self.logger = logger.bind(name="IntegratedVoiceAIService")
         
-        # Session management
-        self.active_sessions: Dict[str, Dict[str, Any]] = {}
+        # Session management: bounded + expiring, so sessions abandoned
+        # without end_session (client crash, dropped transport) age out
+        # instead of leaking; the connectors keep their own per-session
+        # state which is reaped on their side
+        self.active_sessions: TTLCache = _SessionCache(
+            maxsize=settings.max_sessions,
+            ttl=settings.session_ttl_seconds,
+            on_evict=self._on_session_evicted
+        )
+        # user_id -> session_id for O(1) lookup of a user's live session
+        self._user_index: Dict[str, str] = {}
+        # Connected session ids, kept alongside the session records so
+        # status checks are a set membership test instead of a dict
+        # fetch plus string compare
+        self._connected: set[str] = set()
+        # Per-session pending text deltas plus the timer that will flush
+        # them as one callback invocation
+        self._text_buffer: Dict[str, List[str]] = {}
+        self._text_flush: Dict[str, asyncio.TimerHandle] = {}
+        # Currently connected session, maintained on join/end/status
+        # changes so per-frame lookups don't scan the sessions dict
+        self._current_session_id: Optional[str] = None
         
-        # Callbacks
+        # Callbacks; coroutine functions are detected once in
+        # set_callbacks so the hot loops never re-inspect them
         self.on_audio_output: Optional[Callable[[bytes, str], None]] = None
         self.on_text_response: Optional[Callable[[str, float], None]] = None
         self.on_status_change: Optional[Callable[[str], None]] = None
         self.on_error: Optional[Callable[[str], None]] = None
+        self._async_callbacks: frozenset = frozenset()
         
     async def initialize(self) -> None:
         """Initialize both LiveKit and Gemini connectors."""
@@ -66,15 +119,23 @@ class IntegratedVoiceAIService:
             # Start Gemini session
             gemini_session = await self.gemini_connector.start_session(session_id, user_id, session_config)
             
-            # Store session information
+            # Store session information. The audio queue decouples the
+            # LiveKit receive callback from Gemini turnaround: ingest
+            # enqueues and returns, the consumer task drains
+            audio_queue: asyncio.Queue = asyncio.Queue(maxsize=32)
             self.active_sessions[session_id] = {
                 "user_id": user_id,
                 "session_id": session_id,
                 "room_info": room_info,
                 "gemini_session": gemini_session,
                 "start_time": time.time(),
-                "status": "active"
+                "status": "active",
+                "audio_queue": audio_queue,
+                "consumer_task": asyncio.create_task(
+                    self._gemini_consumer(session_id, audio_queue)
+                )
             }
+            self._user_index[user_id] = session_id
             
             self.logger.info(f"Created session {session_id} for user {user_id}")
             
@@ -100,7 +161,9 @@ class IntegratedVoiceAIService:
             
             # Update session status
             self.active_sessions[session_id]["status"] = "connected"
-            
+            self._connected.add(session_id)
+            self._current_session_id = session_id
+
             self.logger.info(f"Joined session {session_id} as server participant")
             
         except Exception as e:
@@ -108,74 +171,110 @@ class IntegratedVoiceAIService:
             raise
     
     async def _handle_audio_input(self, audio_data: bytes, format: str) -> None:
-        """Handle audio input from LiveKit and process with Gemini."""
+        """Queue audio from LiveKit for the per-session Gemini consumer.
+
+        Returns immediately so a Gemini latency spike can't stall the
+        LiveKit frame pump; when the queue is full the oldest chunk is
+        dropped to preserve real-time semantics.
+        """
         try:
-            # Convert audio data to base64 for Gemini
-            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-            
             # Find the session this audio belongs to
             session_id = self._get_current_session_id()
             if not session_id:
                 self.logger.warning("No active session for audio input")
                 return
-            
-            # Process audio with Gemini
-            async for response in self.gemini_connector.process_audio_input(audio_base64, session_id):
-                if response["type"] == "text_response":
-                    # Send text response to client
-                    if self.on_text_response:
-                        self.on_text_response(response["content"], 1.0)
-                    
-                    # TODO: Convert text to speech and send audio back via LiveKit
-                    # For now, we'll just log the response
-                    self.logger.info(f"AI Response: {response['content']}")
-                    
-                elif response["type"] == "error":
-                    if self.on_error:
-                        self.on_error(response["error"])
-                        
+
+            queue = self.active_sessions[session_id]["audio_queue"]
+            try:
+                queue.put_nowait(audio_data)
+            except asyncio.QueueFull:
+                # Stale audio is worthless; shed the oldest chunk
+                queue.get_nowait()
+                queue.put_nowait(audio_data)
+
         except Exception as e:
             self.logger.error(f"Error handling audio input: {e}")
             if self.on_error:
-                self.on_error(str(e))
+                await self._fire(self.on_error, str(e))
+
+    async def _gemini_consumer(self, session_id: str, queue: asyncio.Queue) -> None:
+        """Drain a session's audio queue through Gemini.
+
+        One long-lived task per session; a None sentinel from end_session
+        shuts it down after the queue is drained.
+        """
+        # Bind hot references once; this loop runs per 20ms audio frame
+        # so repeated attribute chains are measurable
+        get = queue.get
+        fire = self._fire
+        buffer_text = self._buffer_text
+        process = self.gemini_connector.process_audio_input
+        log = self.logger
+        while True:
+            audio_data = await get()
+            if audio_data is None:
+                break
+            # Callbacks are re-bindable via set_callbacks, so re-read
+            # them per chunk rather than freezing them for the session
+            on_err = self.on_error
+            try:
+                # Process audio with Gemini; the connector takes raw
+                # bytes, base64 exists only at the SDK's own boundary
+                async for response in process(audio_data, session_id):
+                    if response["type"] == "text_response":
+                        # Deltas are coalesced; the flush timer invokes
+                        # on_text_response with the joined text
+                        buffer_text(session_id, response["content"])
+
+                    elif response["type"] == "error":
+                        if on_err:
+                            await fire(on_err, response["error"])
+
+            except Exception as e:
+                log.error(f"Error processing queued audio: {e}")
+                if on_err:
+                    await fire(on_err, str(e))
     
     async def _handle_screen_share(self, frame_data: bytes, format: str) -> None:
         """Handle screen share from LiveKit and process with Gemini."""
         try:
-            # Convert frame data to base64 for Gemini
-            frame_base64 = base64.b64encode(frame_data).decode('utf-8')
-            
             # Find the session this frame belongs to
             session_id = self._get_current_session_id()
             if not session_id:
                 self.logger.warning("No active session for screen share")
                 return
-            
-            # Process screen share with Gemini
-            async for response in self.gemini_connector.process_screen_share(frame_base64, session_id):
+
+            # Process screen share with Gemini on the raw frame bytes;
+            # hoist the per-response attribute chains out of the loop
+            fire = self._fire
+            buffer_text = self._buffer_text
+            on_err = self.on_error
+            async for response in self.gemini_connector.process_screen_share(frame_data, session_id):
                 if response["type"] == "text_response":
-                    # Send text response to client
-                    if self.on_text_response:
-                        self.on_text_response(response["content"], 1.0)
-                    
-                    self.logger.info(f"AI Screen Analysis: {response['content']}")
-                    
+                    buffer_text(session_id, response["content"])
+
                 elif response["type"] == "error":
-                    if self.on_error:
-                        self.on_error(response["error"])
+                    if on_err:
+                        await fire(on_err, response["error"])
                         
         except Exception as e:
             self.logger.error(f"Error handling screen share: {e}")
             if self.on_error:
-                self.on_error(str(e))
+                await self._fire(self.on_error, str(e))
     
     async def _handle_livekit_status_change(self, status: str) -> None:
         """Handle LiveKit status changes."""
         try:
             self.logger.info(f"LiveKit status changed: {status}")
-            
+
+            # A transport drop means no session is currently connected
+            if status in ("disconnected", "failed"):
+                if self._current_session_id is not None:
+                    self._connected.discard(self._current_session_id)
+                self._current_session_id = None
+
             if self.on_status_change:
-                self.on_status_change(status)
+                await self._fire(self.on_status_change, status)
                 
         except Exception as e:
             self.logger.error(f"Error handling LiveKit status change: {e}")
@@ -186,17 +285,72 @@ class IntegratedVoiceAIService:
             self.logger.error(f"LiveKit error: {error}")
             
             if self.on_error:
-                self.on_error(error)
+                await self._fire(self.on_error, error)
                 
         except Exception as e:
             self.logger.error(f"Error handling LiveKit error: {e}")
     
+    def _on_session_evicted(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Release side state for a session dropped by the TTL cache.
+
+        Runs on both TTL expiry and size eviction; every step is
+        idempotent, so records already closed by end_session pass
+        through harmlessly.
+        """
+        self._connected.discard(session_id)
+        if self._current_session_id == session_id:
+            self._current_session_id = None
+        user_id = session.get("user_id")
+        if user_id is not None and self._user_index.get(user_id) == session_id:
+            del self._user_index[user_id]
+        handle = self._text_flush.pop(session_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._text_buffer.pop(session_id, None)
+        # Stop the consumer task; if the queue is somehow full, cancel it
+        try:
+            session["audio_queue"].put_nowait(None)
+        except asyncio.QueueFull:
+            session["consumer_task"].cancel()
+
+    def _buffer_text(self, session_id: str, delta: str) -> None:
+        """Buffer a streamed text delta for coalesced delivery.
+
+        Gemini streams word-level deltas; emitting one callback (and one
+        client frame) per delta floods the socket with tiny sends. Each
+        delta lands in a per-session buffer, and a single timer flushes
+        the joined text after _TEXT_FLUSH_INTERVAL.
+        """
+        self._text_buffer.setdefault(session_id, []).append(delta)
+        if session_id not in self._text_flush:
+            self._text_flush[session_id] = asyncio.get_running_loop().call_later(
+                _TEXT_FLUSH_INTERVAL, self._flush_text, session_id
+            )
+
+    def _flush_text(self, session_id: str) -> None:
+        """Emit buffered text deltas as one on_text_response call."""
+        self._text_flush.pop(session_id, None)
+        chunks = self._text_buffer.pop(session_id, None)
+        if not chunks:
+            return
+        text = "".join(chunks)
+        cb = self.on_text_response
+        if cb is not None:
+            if cb in self._async_callbacks:
+                asyncio.get_running_loop().create_task(cb(text, 1.0))
+            else:
+                cb(text, 1.0)
+        # TODO: Convert text to speech and send audio back via LiveKit
+        # For now, we'll just log the response
+        self.logger.opt(lazy=True).debug("AI Response: {}", lambda: text)
+
     def _get_current_session_id(self) -> Optional[str]:
-        """Get the current active session ID."""
-        for session_id, session_info in self.active_sessions.items():
-            if session_info["status"] == "connected":
-                return session_id
-        return None
+        """Get the current active session ID.
+
+        O(1) attribute read; called once per inbound audio chunk and
+        screen-share frame.
+        """
+        return self._current_session_id
     
     async def publish_ai_audio(self, audio_data: bytes, sample_rate: int = 16000, channels: int = 1) -> None:
         """Publish AI-generated audio back to the LiveKit room."""
@@ -204,19 +358,40 @@ class IntegratedVoiceAIService:
             await self.livekit_connector.publish_audio(audio_data, sample_rate, channels)
             
             if self.on_audio_output:
-                self.on_audio_output(audio_data, "wav")
+                await self._fire(self.on_audio_output, audio_data, "wav")
                 
         except Exception as e:
             self.logger.error(f"Failed to publish AI audio: {e}")
             if self.on_error:
-                self.on_error(str(e))
+                await self._fire(self.on_error, str(e))
     
     def set_callbacks(self, callbacks: Dict[str, Callable]) -> None:
-        """Set callback functions for various events."""
+        """Set callback functions for various events.
+
+        Callbacks may be plain functions or coroutine functions; which
+        they are is recorded here, once, rather than per invocation.
+        """
         self.on_audio_output = callbacks.get('on_audio_output')
         self.on_text_response = callbacks.get('on_text_response')
         self.on_status_change = callbacks.get('on_status_change')
         self.on_error = callbacks.get('on_error')
+        self._async_callbacks = frozenset(
+            cb for cb in (self.on_audio_output, self.on_text_response,
+                          self.on_status_change, self.on_error)
+            if cb is not None and inspect.iscoroutinefunction(cb)
+        )
+
+    async def _fire(self, cb: Callable, *args: Any) -> None:
+        """Invoke a callback from a hot loop.
+
+        Coroutine callbacks are awaited; sync callbacks are deferred via
+        call_soon so user code runs between loop iterations instead of
+        inline in the streaming consumer.
+        """
+        if cb in self._async_callbacks:
+            await cb(*args)
+        else:
+            asyncio.get_running_loop().call_soon(cb, *args)
     
     async def end_session(self, session_id: str) -> Dict[str, Any]:
         """End a voice AI session."""
@@ -227,12 +402,34 @@ class IntegratedVoiceAIService:
             # End Gemini session
             gemini_result = await self.gemini_connector.end_session(session_id)
             
-            # Disconnect from LiveKit room
-            await self.livekit_connector.disconnect()
-            
+            # Leave this session's LiveKit room; a full connector
+            # disconnect here would also cancel the worker pool other
+            # sessions depend on, so that is reserved for cleanup()
+            if self._current_session_id == session_id:
+                await self.livekit_connector.leave_room()
+
             # Update session status
             self.active_sessions[session_id]["status"] = "ended"
             self.active_sessions[session_id]["end_time"] = time.time()
+            self._connected.discard(session_id)
+            if self._current_session_id == session_id:
+                self._current_session_id = None
+            user_id = self.active_sessions[session_id]["user_id"]
+            if self._user_index.get(user_id) == session_id:
+                del self._user_index[user_id]
+
+            # Deliver any text still sitting in the coalescing buffer
+            handle = self._text_flush.pop(session_id, None)
+            if handle is not None:
+                handle.cancel()
+            self._flush_text(session_id)
+
+            # Stop the audio consumer once it has drained the queue; if
+            # the queue is somehow still full, just cancel the task
+            try:
+                self.active_sessions[session_id]["audio_queue"].put_nowait(None)
+            except asyncio.QueueFull:
+                self.active_sessions[session_id]["consumer_task"].cancel()
             
             self.logger.info(f"Ended session {session_id}")
             
@@ -246,27 +443,45 @@ class IntegratedVoiceAIService:
             self.logger.error(f"Failed to end session {session_id}: {e}")
             raise
     
-    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get information about a session."""
-        if session_id in self.active_sessions:
-            session_info = self.active_sessions[session_id].copy()
-            session_info["livekit_info"] = self.livekit_connector.get_room_info()
-            session_info["gemini_info"] = self.gemini_connector.get_session_info(session_id)
-            return session_info
-        return None
+    def get_session_info(self, session_id: str) -> Optional[Mapping[str, Any]]:
+        """Get information about a session.
+
+        Returns a view layered over the live session record rather than a
+        copy; status polling hits this often enough that the per-call
+        copy of the nested session dict showed up in profiles.
+        """
+        session = self.active_sessions.get(session_id)
+        if session is None:
+            return None
+        overlay = {
+            "livekit_info": self.livekit_connector.get_room_info(),
+            "gemini_info": self.gemini_connector.get_session_info(session_id),
+        }
+        return ChainMap(overlay, session)
     
+    def get_session_for_user(self, user_id: str) -> Optional[str]:
+        """Get the live session id for a user, if any. O(1)."""
+        session_id = self._user_index.get(user_id)
+        if session_id is not None and session_id in self.active_sessions:
+            return session_id
+        return None
+
     def is_session_active(self, session_id: str) -> bool:
         """Check if a session is active."""
-        return (session_id in self.active_sessions and 
-                self.active_sessions[session_id]["status"] == "connected")
-    
+        return session_id in self._connected
+
     async def cleanup(self) -> None:
         """Clean up all resources."""
         try:
-            # End all active sessions
-            for session_id in list(self.active_sessions.keys()):
-                if self.active_sessions[session_id]["status"] == "connected":
-                    await self.end_session(session_id)
+            # End all connected sessions in parallel; shutdown time is
+            # then bounded by the slowest teardown, not their sum
+            results = await asyncio.gather(
+                *(self.end_session(sid) for sid in list(self._connected)),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    self.logger.error(f"Session teardown failed: {result}")
             
             # Disconnect from LiveKit
             await self.livekit_connector.disconnect()
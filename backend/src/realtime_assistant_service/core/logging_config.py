@@ -4,9 +4,31 @@ Logging configuration for the Real-time Voice AI Assistant Service.
 
 import sys
 from pathlib import Path
+import orjson
 from loguru import logger
 from .config import settings
 
+# Maps stdlib level names to loguru levels (or raw numbers for custom
+# levels), filled lazily by InterceptHandler
+_LEVEL_CACHE: dict = {}
+
+
+def _serialize_record(record: dict) -> None:
+    """Attach an orjson-encoded form of the record for the JSONL sink.
+
+    Runs as a global patcher so the structured sink can emit
+    pre-serialized lines via a plain format string instead of loguru's
+    stdlib-json serialize=True path.
+    """
+    record["extra"]["serialized"] = orjson.dumps({
+        "time": record["time"].timestamp(),
+        "level": record["level"].name,
+        "name": record["extra"].get("name", record["name"]),
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }).decode()
+
 
 def setup_logging() -> None:
     """Configure structured logging for the application."""
@@ -14,62 +36,82 @@ def setup_logging() -> None:
     # Remove default logger
     logger.remove()
     
-    # Add console logger with custom format
+    # Add console logger with custom format. diagnose formats every
+    # frame's locals on exceptions — prohibitively slow on deep async
+    # stacks, so both rich-traceback modes are debug-only
     logger.add(
         sys.stdout,
         format=settings.log_format,
         level=settings.log_level,
         colorize=True,
-        backtrace=True,
-        diagnose=True,
+        backtrace=settings.debug,
+        diagnose=settings.debug,
     )
-    
-    # Add file logger for production
+
+    # Add file logger for production; enqueue moves disk I/O onto
+    # loguru's writer thread so logging never blocks the event loop
     if not settings.debug:
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
-        
+
         logger.add(
             log_dir / "app.log",
             format=settings.log_format,
             level=settings.log_level,
-            rotation="10 MB",
+            rotation="50 MB",
             retention="7 days",
             compression="zip",
-            backtrace=True,
-            diagnose=True,
+            enqueue=True,
+            backtrace=False,
+            diagnose=False,
         )
-        
+
+        # Add structured JSONL log; records are serialized once by the
+        # orjson patcher rather than loguru's stdlib-json serializer
+        logger.configure(patcher=_serialize_record)
+        logger.add(
+            log_dir / "app.jsonl",
+            format="{extra[serialized]}",
+            level=settings.log_level,
+            rotation="50 MB",
+            retention="7 days",
+            compression="zip",
+            enqueue=True,
+        )
+
         # Add error log file
         logger.add(
             log_dir / "error.log",
             format=settings.log_format,
             level="ERROR",
-            rotation="10 MB",
+            rotation="50 MB",
             retention="30 days",
             compression="zip",
-            backtrace=True,
-            diagnose=True,
+            enqueue=True,
+            backtrace=False,
+            diagnose=False,
         )
     
     # Intercept standard library logging
     import logging
-    
+
     class InterceptHandler(logging.Handler):
         def emit(self, record):
-            # Get corresponding Loguru level if it exists
-            try:
-                level = logger.level(record.levelname).name
-            except ValueError:
-                level = record.levelno
-            
-            # Find caller from where originated the logged message
-            frame, depth = sys._getframe(6), 6
-            while frame and frame.f_code.co_filename == __file__:
-                frame = frame.f_back
-                depth += 1
-            
-            logger.opt(depth=depth, exception=record.exc_info).log(
+            # Resolve the loguru level once per level name; emit fires on
+            # every stdlib record so avoid the try/except on the hot path
+            level = _LEVEL_CACHE.get(record.levelname)
+            if level is None:
+                try:
+                    level = logger.level(record.levelname).name
+                except ValueError:
+                    level = record.levelno
+                _LEVEL_CACHE[record.levelname] = level
+
+            # The stdlib call chain from the logging call site to emit is
+            # fixed (info/debug/... -> _log -> handle -> callHandlers ->
+            # Handler.handle -> emit), so the caller sits at a constant
+            # depth of 6 — no frame walk needed
+            logger.opt(depth=6, exception=record.exc_info).log(
                 level, record.getMessage()
             )
     
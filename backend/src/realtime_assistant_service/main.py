@@ -2,7 +2,9 @@
 Main FastAPI application for the Real-time Voice AI Assistant Service.
 """
 
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
 from typing import Optional
@@ -24,6 +26,13 @@ async def lifespan(app: FastAPI):
     setup_logging()
     logger.info(f"Application version: {settings.app_version}")
     logger.info(f"Debug mode: {settings.debug}")
+
+    # Size the default executor for whatever blocking work still runs
+    # through it (file IO, library internals), so bursts don't queue
+    # behind its small default worker pool
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.gemini_concurrency * 2)
+    )
     
     yield
     
@@ -108,12 +117,21 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     import uvicorn
-    
+
     logger.info(f"Starting server on {settings.host}:{settings.port}")
     uvicorn.run(
         "src.realtime_assistant_service.main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        log_level=settings.log_level.lower()
-    ) 
\ No newline at end of file
+        # Single worker: session state (connection manager, connectors,
+        # session cache) lives in process memory, so multiple workers
+        # would route requests to workers that never saw the session.
+        # Scale out only once that state is externalized
+        log_level=settings.log_level.lower(),
+        # auto resolves to uvloop where installed; uvloop is skipped on
+        # Windows via the dependency marker
+        loop="auto",
+        http="httptools",
+        ws_per_message_deflate=True
+    )
\ No newline at end of file
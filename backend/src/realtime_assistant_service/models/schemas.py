@@ -2,9 +2,10 @@
 Pydantic models for request/response validation and data schemas.
 """
 
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -20,9 +21,24 @@ class ActionType(str, Enum):
 
 
 class WebSocketMessage(BaseModel):
-    """Base WebSocket message model."""
+    """Base WebSocket message model.
+
+    The timestamp is a plain Unix float: these models are built for
+    every inbound frame, and a time.time() call is far cheaper than
+    constructing a datetime per message.
+
+    The config trims per-message validation work: unknown keys are
+    dropped instead of validated, defaults aren't re-validated, and
+    instances are frozen (nothing mutates a parsed message).
+    """
+    model_config = ConfigDict(
+        frozen=True,
+        extra="ignore",
+        validate_default=False,
+    )
+
     action: ActionType
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: float = Field(default_factory=time.time)
     session_id: Optional[str] = None
     user_id: Optional[str] = None
 
@@ -51,7 +67,7 @@ class ScreenShareFrameMessage(WebSocketMessage):
     session_id: str = Field(..., description="Session ID")
     data: str = Field(..., description="Base64 encoded image frame")
     format: str = Field(default="png", description="Image format")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Frame timestamp")
+    timestamp: float = Field(default_factory=time.time, description="Frame timestamp")
 
 
 class EndSessionMessage(WebSocketMessage):